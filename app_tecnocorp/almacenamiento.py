@@ -0,0 +1,61 @@
+import gzip
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, StaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+EXTENSIONES_COMPRIMIBLES = ('.css', '.js', '.svg', '.json', '.txt', '.xml', '.html', '.map', '.ico')
+
+
+def variantes_comprimidas():
+    variantes = [('gzip', '.gz', lambda datos: gzip.compress(datos, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variantes.insert(0, ('br', '.br', lambda datos: brotli.compress(datos, quality=11)))
+    return variantes
+
+
+class AlmacenamientoEstaticoComprimido(ManifestStaticFilesStorage):
+    manifest_strict = False
+
+    def post_process(self, *args, **kwargs):
+        yield from super().post_process(*args, **kwargs)
+        if kwargs.get('dry_run'):
+            return
+        for nombre in set(self.hashed_files.values()):
+            self.precomprimir(nombre)
+
+    def precomprimir(self, nombre):
+        if not nombre.endswith(EXTENSIONES_COMPRIMIBLES):
+            return
+        with self.open(nombre) as archivo:
+            datos = archivo.read()
+        if len(datos) < settings.COMPRESION_TAMAÑO_MINIMO:
+            return
+        for _, extension, comprimir in variantes_comprimidas():
+            comprimido = comprimir(datos)
+            if len(comprimido) >= len(datos):
+                continue
+            if self.exists(nombre + extension):
+                self.delete(nombre + extension)
+            self._save(nombre + extension, ContentFile(comprimido))
+
+    def es_versionado(self, nombre):
+        return nombre in self.nombres_versionados
+
+    @property
+    def nombres_versionados(self):
+        if getattr(self, '_nombres_versionados', None) is None:
+            self._nombres_versionados = set(self.hashed_files.values())
+        return self._nombres_versionados
+
+    def url(self, name, force=False):
+        try:
+            return super().url(name, force)
+        except ValueError:
+            # Sin collectstatic (desarrollo, pruebas) se sirve el nombre original.
+            return StaticFilesStorage.url(self, name)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AppTecnocorpConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app_tecnocorp'
+
+    def ready(self):
+        from .signals import conectar_senales
+        conectar_senales()
@@ -0,0 +1,116 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+
+ACEPTA_GZIP = re.compile(r'\bgzip\b')
+ACEPTA_BROTLI = re.compile(r'\bbr\b')
+
+VARIANTES_PRECOMPRIMIDAS = [('br', '.br', ACEPTA_BROTLI), ('gzip', '.gz', ACEPTA_GZIP)]
+
+CACHE_INMUTABLE = 'public, max-age=31536000, immutable'
+CACHE_REVALIDAR = 'public, max-age=0, must-revalidate'
+
+RANGO_BYTES = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+TAMAÑO_BLOQUE = 64 * 1024
+
+mimetypes.add_type('image/avif', '.avif')
+mimetypes.add_type('image/webp', '.webp')
+mimetypes.add_type('image/jpeg', '.jfif')
+
+
+def tipo_de_archivo(nombre):
+    tipo, _ = mimetypes.guess_type(nombre)
+    return tipo or 'application/octet-stream'
+
+
+def etag_de_archivo(estado):
+    return f'"{estado.st_size:x}-{estado.st_mtime_ns:x}"'
+
+
+def rango_solicitado(request, tamaño, etag, modificado):
+    cabecera = request.META.get('HTTP_RANGE', '').strip()
+    if not cabecera:
+        return None
+    si_rango = request.META.get('HTTP_IF_RANGE')
+    if si_rango and si_rango != etag and parse_http_date_safe(si_rango) != modificado:
+        return None
+    # Varios rangos o unidades distintas a bytes se responden con el archivo completo.
+    coincidencia = RANGO_BYTES.match(cabecera)
+    if not coincidencia:
+        return None
+    inicio, fin = coincidencia.groups()
+    if not inicio:
+        if not fin or int(fin) == 0:
+            return False
+        return max(tamaño - int(fin), 0), tamaño - 1
+    inicio = int(inicio)
+    fin = min(int(fin), tamaño - 1) if fin else tamaño - 1
+    if inicio >= tamaño or inicio > fin:
+        return False
+    return inicio, fin
+
+
+def leer_rango(ruta, inicio, largo):
+    with open(ruta, 'rb') as archivo:
+        archivo.seek(inicio)
+        while largo > 0:
+            bloque = archivo.read(min(TAMAÑO_BLOQUE, largo))
+            if not bloque:
+                break
+            largo -= len(bloque)
+            yield bloque
+
+
+def respuesta_delegada(ruta, tipo, delegacion):
+    respuesta = HttpResponse(content_type=tipo)
+    modo, destino = delegacion
+    if modo == 'x-accel-redirect':
+        respuesta.headers['X-Accel-Redirect'] = quote(destino)
+    else:
+        respuesta.headers['X-Sendfile'] = ruta
+    return respuesta
+
+
+def respuesta_archivo(request, ruta, tipo, cache_control, codificacion=None, variar=(), delegacion=None):
+    estado = os.stat(ruta)
+    etag = etag_de_archivo(estado)
+    modificado = int(estado.st_mtime)
+    respuesta = get_conditional_response(request, etag=etag, last_modified=modificado)
+    if respuesta is None and delegacion:
+        respuesta = respuesta_delegada(ruta, tipo, delegacion)
+    elif respuesta is None:
+        rango = rango_solicitado(request, estado.st_size, etag, modificado) if codificacion is None else None
+        if rango is False:
+            respuesta = HttpResponse(status=416)
+            respuesta.headers['Content-Range'] = f'bytes */{estado.st_size}'
+        elif rango:
+            inicio, fin = rango
+            respuesta = StreamingHttpResponse(leer_rango(ruta, inicio, fin - inicio + 1), status=206, content_type=tipo)
+            respuesta.headers['Content-Range'] = f'bytes {inicio}-{fin}/{estado.st_size}'
+            respuesta.headers['Content-Length'] = str(fin - inicio + 1)
+        else:
+            respuesta = FileResponse(open(ruta, 'rb'), content_type=tipo)
+            if codificacion:
+                respuesta.headers['Content-Encoding'] = codificacion
+        if codificacion is None:
+            respuesta.headers['Accept-Ranges'] = 'bytes'
+    respuesta.headers['ETag'] = etag
+    respuesta.headers['Last-Modified'] = http_date(modificado)
+    respuesta.headers['Cache-Control'] = cache_control
+    if variar:
+        patch_vary_headers(respuesta, variar)
+    return respuesta
+
+
+def variante_precomprimida(request, ruta):
+    aceptadas = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    for codificacion, extension, acepta in VARIANTES_PRECOMPRIMIDAS:
+        if acepta.search(aceptadas) and os.path.isfile(ruta + extension):
+            return ruta + extension, codificacion
+    return ruta, None
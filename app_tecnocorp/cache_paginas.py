@@ -0,0 +1,153 @@
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .catalogo import aversion_catalogo, version_catalogo
+from .models import LineaCarrito
+
+MARCADOR_CSRF = 'csrf-token-pendiente'
+
+
+def pagina_cacheable(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if request.user.is_authenticated:
+        return False
+    carrito_id = request.session.get('carrito')
+    if carrito_id and LineaCarrito.objects.filter(carrito_id=carrito_id).exists():
+        return False
+    return len(get_messages(request)) == 0
+
+
+def respuesta_guardable(request, respuesta):
+    return (
+        respuesta.status_code == 200
+        and not respuesta.streaming
+        and not respuesta.cookies
+        and len(get_messages(request)) == 0
+    )
+
+
+def clave_pagina(request, version):
+    ruta = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'pagina:{version}:{ruta}'
+
+
+def pagina_guardada(respuesta):
+    return {'contenido': respuesta.content, 'tipo': respuesta['Content-Type']}
+
+
+def poner_token(request, respuesta):
+    marcador = MARCADOR_CSRF.encode()
+    if not respuesta.streaming and marcador in respuesta.content:
+        respuesta.content = respuesta.content.replace(marcador, get_token(request).encode())
+    return respuesta
+
+
+def respuesta_de_pagina(request, guardada, estado):
+    respuesta = poner_token(request, HttpResponse(guardada['contenido'], content_type=guardada['tipo']))
+    respuesta['X-Cache-Pagina'] = estado
+    patch_vary_headers(respuesta, ('Cookie',))
+    return respuesta
+
+
+def cache_pagina_anonima(vista):
+    if iscoroutinefunction(vista):
+        @wraps(vista)
+        async def envoltura_asincrona(request, *args, **kwargs):
+            if not await sync_to_async(pagina_cacheable)(request):
+                return await vista(request, *args, **kwargs)
+            clave = clave_pagina(request, await aversion_catalogo())
+            guardada = await cache.aget(clave)
+            if guardada is not None:
+                return respuesta_de_pagina(request, guardada, 'HIT')
+            request.pagina_en_cache = True
+            respuesta = await vista(request, *args, **kwargs)
+            if not await sync_to_async(respuesta_guardable)(request, respuesta):
+                return poner_token(request, respuesta)
+            guardada = pagina_guardada(respuesta)
+            await cache.aset(clave, guardada, settings.SEGUNDOS_CACHE_PAGINAS)
+            return respuesta_de_pagina(request, guardada, 'MISS')
+
+        return envoltura_asincrona
+
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        if not pagina_cacheable(request):
+            return vista(request, *args, **kwargs)
+        clave = clave_pagina(request, version_catalogo())
+        guardada = cache.get(clave)
+        if guardada is not None:
+            return respuesta_de_pagina(request, guardada, 'HIT')
+        request.pagina_en_cache = True
+        respuesta = vista(request, *args, **kwargs)
+        if not respuesta_guardable(request, respuesta):
+            return poner_token(request, respuesta)
+        guardada = pagina_guardada(respuesta)
+        cache.set(clave, guardada, settings.SEGUNDOS_CACHE_PAGINAS)
+        return respuesta_de_pagina(request, guardada, 'MISS')
+
+    return envoltura
+
+
+def calcular_validadores(validadores, request, *args, **kwargs):
+    if request.method not in ('GET', 'HEAD') or len(get_messages(request)):
+        return None, None
+    datos = validadores(request, *args, **kwargs)
+    if datos is None:
+        return None, None
+    marca, ultimo = datos
+    # La misma URL cambia con el usuario y con el token CSRF incrustado en los formularios.
+    variante = '|'.join([
+        marca,
+        request.get_full_path(),
+        str(request.user.pk or ''),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+    ])
+    etag = quote_etag(hashlib.md5(variante.encode()).hexdigest())
+    modificado = None
+    if ultimo is not None and not request.user.is_authenticated:
+        modificado = int(ultimo.timestamp())
+    return etag, modificado
+
+
+def agregar_validadores(respuesta, etag, modificado):
+    if etag:
+        respuesta.headers.setdefault('ETag', etag)
+    if modificado and not respuesta.has_header('Last-Modified'):
+        respuesta.headers['Last-Modified'] = http_date(modificado)
+    return respuesta
+
+
+def respuesta_condicional(validadores):
+    def decorador(vista):
+        if iscoroutinefunction(vista):
+            @wraps(vista)
+            async def envoltura_asincrona(request, *args, **kwargs):
+                etag, modificado = await sync_to_async(calcular_validadores)(validadores, request, *args, **kwargs)
+                respuesta = get_conditional_response(request, etag=etag, last_modified=modificado)
+                if respuesta is None:
+                    respuesta = await vista(request, *args, **kwargs)
+                return agregar_validadores(respuesta, etag, modificado)
+
+            return envoltura_asincrona
+
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            etag, modificado = calcular_validadores(validadores, request, *args, **kwargs)
+            respuesta = get_conditional_response(request, etag=etag, last_modified=modificado)
+            if respuesta is None:
+                respuesta = vista(request, *args, **kwargs)
+            return agregar_validadores(respuesta, etag, modificado)
+
+        return envoltura
+
+    return decorador
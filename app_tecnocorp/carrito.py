@@ -0,0 +1,157 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, Exists, F, OuterRef, Subquery, Sum
+
+from .catalogo import MODELOS_CATALOGO
+from .models import Carrito, LineaCarrito
+from .transacciones import escritura_inmediata
+
+TASA_IMPUESTOS = Decimal('0.16')
+
+
+def obtener_carrito(request, crear=False):
+    if request.user.is_authenticated:
+        if crear:
+            carrito, _ = Carrito.objects.get_or_create(usuario=request.user)
+            return carrito
+        return Carrito.objects.filter(usuario=request.user).first()
+    carrito_id = request.session.get('carrito')
+    if isinstance(carrito_id, int):
+        carrito = Carrito.objects.filter(pk=carrito_id, usuario__isnull=True).first()
+        if carrito:
+            return carrito
+    if not crear:
+        return None
+    carrito = Carrito.objects.create()
+    request.session['carrito'] = carrito.pk
+    return carrito
+
+
+def separar_clave(clave):
+    tipo, _, pk = clave.rpartition('-')
+    if not tipo or not pk.isdigit():
+        return None, None
+    return tipo, int(pk)
+
+
+def lineas_de(carrito):
+    if carrito is None:
+        return LineaCarrito.objects.none()
+    return carrito.lineas.order_by('id')
+
+
+def sumar_linea(carrito, tipo, producto, cantidad=1):
+    lineas = LineaCarrito.objects.filter(carrito=carrito, tipo=tipo, id_producto=producto.pk)
+    if lineas.update(cantidad=F('cantidad') + cantidad):
+        return
+    try:
+        with transaction.atomic():
+            LineaCarrito.objects.create(
+                carrito=carrito,
+                tipo=tipo,
+                id_producto=producto.pk,
+                nombre=producto.nombre,
+                precio=producto.precio,
+                categoria=getattr(producto, 'categoria', ''),
+                imagen=producto.foto.url if producto.foto else '',
+                cantidad=cantidad,
+            )
+    except IntegrityError:
+        lineas.update(cantidad=F('cantidad') + cantidad)
+
+
+def fijar_cantidad(carrito, clave, cantidad):
+    tipo, pk = separar_clave(clave)
+    if carrito is None or tipo is None:
+        return 0
+    lineas = LineaCarrito.objects.filter(carrito=carrito, tipo=tipo, id_producto=pk)
+    if cantidad <= 0:
+        return lineas.delete()[0]
+    return lineas.update(cantidad=cantidad)
+
+
+def quitar_linea(carrito, clave):
+    return fijar_cantidad(carrito, clave, 0)
+
+
+def vaciar(carrito):
+    if carrito is not None:
+        carrito.lineas.all().delete()
+
+
+def totales_desde_subtotal(subtotal):
+    impuestos = subtotal * TASA_IMPUESTOS
+    total = subtotal + impuestos
+    return subtotal, impuestos, total
+
+
+def calcular_totales_carrito(carrito):
+    subtotal = lineas_de(carrito).aggregate(
+        subtotal=Sum(F('precio') * F('cantidad'), output_field=DecimalField(max_digits=12, decimal_places=2))
+    )['subtotal'] or Decimal('0.00')
+    return totales_desde_subtotal(subtotal)
+
+
+def calcular_totales_lineas(lineas):
+    return totales_desde_subtotal(sum((linea.subtotal for linea in lineas), Decimal('0.00')))
+
+
+def revalidar_precios(lineas, using=None):
+    por_tipo = defaultdict(list)
+    for linea in lineas:
+        por_tipo[linea.tipo].append(linea)
+
+    vigentes = []
+    cambiadas = []
+    retiradas = []
+    for tipo, lineas_tipo in por_tipo.items():
+        modelo = MODELOS_CATALOGO.get(tipo)
+        if modelo is None:
+            retiradas.extend(lineas_tipo)
+            continue
+        productos = modelo.objects.using(using).in_bulk([linea.id_producto for linea in lineas_tipo])
+        for linea in lineas_tipo:
+            producto = productos.get(linea.id_producto)
+            if producto is None:
+                retiradas.append(linea)
+                continue
+            if producto.precio != linea.precio:
+                linea.precio_anterior = linea.precio
+                linea.precio = producto.precio
+                linea.nombre = producto.nombre
+                cambiadas.append(linea)
+            vigentes.append(linea)
+
+    if cambiadas:
+        LineaCarrito.objects.bulk_update(cambiadas, ['precio', 'nombre'])
+    if retiradas:
+        LineaCarrito.objects.filter(pk__in=[linea.pk for linea in retiradas]).delete()
+    vigentes.sort(key=lambda linea: linea.pk)
+    return vigentes, cambiadas, retiradas
+
+
+def fusionar_carrito(carrito_id, usuario):
+    if not isinstance(carrito_id, int):
+        return
+    anonimo = Carrito.objects.filter(pk=carrito_id, usuario__isnull=True).first()
+    if anonimo is None:
+        return
+    with escritura_inmediata():
+        destino = Carrito.objects.filter(usuario=usuario).first()
+        if destino is None:
+            anonimo.usuario = usuario
+            anonimo.save(update_fields=['usuario'])
+            return
+        anonimas = LineaCarrito.objects.filter(
+            carrito=anonimo, tipo=OuterRef('tipo'), id_producto=OuterRef('id_producto')
+        )
+        propias = LineaCarrito.objects.filter(
+            carrito=destino, tipo=OuterRef('tipo'), id_producto=OuterRef('id_producto')
+        )
+        LineaCarrito.objects.filter(carrito=destino).filter(Exists(anonimas)).update(
+            cantidad=F('cantidad') + Subquery(anonimas.values('cantidad')[:1])
+        )
+        anonimo.lineas.exclude(Exists(propias)).update(carrito=destino)
+        anonimo.delete()
@@ -0,0 +1,307 @@
+import asyncio
+import re
+import uuid
+
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import connection, transaction
+from django.db.models import Count, F, Max, Min, Q, Subquery, Window
+from django.db.models.functions import RowNumber
+
+from .models import (
+    CatalogoProducto,
+    ContadorEntidad,
+    PCArmada,
+    Teclado,
+    Monitor,
+    Mouse,
+    Audifonos,
+)
+
+MODELOS_CATALOGO = {
+    'pc': PCArmada,
+    'teclado': Teclado,
+    'monitor': Monitor,
+    'mouse': Mouse,
+    'audifonos': Audifonos,
+}
+
+TIPOS_POR_MODELO = {modelo: tipo for tipo, modelo in MODELOS_CATALOGO.items()}
+
+CAMPOS_CATALOGO = ['nombre', 'categoria', 'precio', 'foto', 'tamaño', 'color', 'actualizado']
+
+TAMAÑO_LOTE = 500
+
+LIMITE_BUSQUEDA = 60
+
+TABLA_FTS = 'app_tecnocorp_catalogo_fts'
+
+LIMITE_DESTACADOS = 3
+
+CLAVE_VERSION_CATALOGO = 'catalogo:version'
+
+FRAGMENTO_TARJETA = 'tarjeta_producto'
+
+CAMPOS_FACETA = ['categoria', 'tamaño', 'color']
+
+
+def entrada_catalogo(tipo, producto):
+    return CatalogoProducto(
+        tipo=tipo,
+        id_producto=producto.pk,
+        nombre=producto.nombre,
+        categoria=producto.categoria,
+        precio=producto.precio,
+        foto=producto.foto.name if producto.foto else '',
+        tamaño=getattr(producto, 'tamaño', ''),
+        color=getattr(producto, 'color', ''),
+        actualizado=producto.actualizado,
+    )
+
+
+def sincronizar_productos(tipo, productos):
+    entradas = [entrada_catalogo(tipo, producto) for producto in productos]
+    if not entradas:
+        return 0
+    CatalogoProducto.objects.bulk_create(
+        entradas,
+        update_conflicts=True,
+        unique_fields=['tipo', 'id_producto'],
+        update_fields=CAMPOS_CATALOGO,
+    )
+    return len(entradas)
+
+
+def eliminar_del_catalogo(tipo, pk):
+    CatalogoProducto.objects.filter(tipo=tipo, id_producto=pk).delete()
+
+
+def foto_en_uso(nombre):
+    return CatalogoProducto.objects.filter(foto=nombre).exists()
+
+
+def reconstruir_catalogo(tamaño_lote=TAMAÑO_LOTE):
+    total = 0
+    with transaction.atomic():
+        CatalogoProducto.objects.all().delete()
+        for tipo, modelo in MODELOS_CATALOGO.items():
+            lote = []
+            for producto in modelo.objects.order_by('pk').iterator(chunk_size=tamaño_lote):
+                lote.append(entrada_catalogo(tipo, producto))
+                if len(lote) >= tamaño_lote:
+                    CatalogoProducto.objects.bulk_create(lote)
+                    total += len(lote)
+                    lote = []
+            if lote:
+                CatalogoProducto.objects.bulk_create(lote)
+                total += len(lote)
+    for tipo in MODELOS_CATALOGO:
+        invalidar_catalogo(tipo)
+    return total
+
+
+def destacados_por_tipo(limite=LIMITE_DESTACADOS, tipos=None):
+    orden_tipos = list(MODELOS_CATALOGO)
+    entradas = CatalogoProducto.objects.all()
+    if tipos is not None:
+        entradas = entradas.filter(tipo__in=tipos)
+    entradas = entradas.annotate(
+        posicion=Window(
+            RowNumber(),
+            partition_by=[F('tipo')],
+            order_by=F('id_producto').asc(),
+        )
+    ).filter(posicion__lte=limite)
+    return sorted(entradas, key=lambda entrada: (orden_tipos.index(entrada.tipo), entrada.id_producto))
+
+
+def clave_version_destacados(tipo):
+    return f'destacados:version:{tipo}'
+
+
+def invalidar_destacados(tipo):
+    cache.set(clave_version_destacados(tipo), uuid.uuid4().hex, None)
+
+
+def version_catalogo():
+    version = uuid.uuid4().hex
+    cache.add(CLAVE_VERSION_CATALOGO, version, None)
+    return cache.get(CLAVE_VERSION_CATALOGO, version)
+
+
+async def aversion_catalogo():
+    version = uuid.uuid4().hex
+    await cache.aadd(CLAVE_VERSION_CATALOGO, version, None)
+    return await cache.aget(CLAVE_VERSION_CATALOGO, version)
+
+
+def invalidar_catalogo(tipo):
+    invalidar_destacados(tipo)
+    cache.set(CLAVE_VERSION_CATALOGO, uuid.uuid4().hex, None)
+
+
+def invalidar_tarjeta(tipo, pk, actualizado):
+    cache.delete(make_template_fragment_key(FRAGMENTO_TARJETA, [tipo, pk, actualizado]))
+    invalidar_catalogo(tipo)
+
+
+def claves_destacados(versiones, limite):
+    nuevas_versiones = {}
+    claves_datos = {}
+    for tipo in MODELOS_CATALOGO:
+        clave = clave_version_destacados(tipo)
+        version = versiones.get(clave)
+        if version is None:
+            version = uuid.uuid4().hex
+            nuevas_versiones[clave] = version
+        claves_datos[tipo] = f'destacados:{tipo}:{version}:{limite}'
+    return claves_datos, nuevas_versiones
+
+
+def unir_destacados(claves_datos, en_cache):
+    destacados = []
+    for tipo in MODELOS_CATALOGO:
+        destacados.extend(en_cache[claves_datos[tipo]])
+    return destacados
+
+
+def obtener_destacados(limite=LIMITE_DESTACADOS):
+    versiones = cache.get_many([clave_version_destacados(tipo) for tipo in MODELOS_CATALOGO])
+    claves_datos, nuevas_versiones = claves_destacados(versiones, limite)
+    if nuevas_versiones:
+        cache.set_many(nuevas_versiones, None)
+
+    en_cache = cache.get_many(claves_datos.values())
+    faltantes = [tipo for tipo, clave in claves_datos.items() if clave not in en_cache]
+    if faltantes:
+        calculados = {tipo: [] for tipo in faltantes}
+        for entrada in destacados_por_tipo(limite, tipos=faltantes):
+            calculados[entrada.tipo].append(entrada)
+        nuevos = {claves_datos[tipo]: entradas for tipo, entradas in calculados.items()}
+        cache.set_many(nuevos, None)
+        en_cache.update(nuevos)
+    return unir_destacados(claves_datos, en_cache)
+
+
+async def adestacados_de_tipo(tipo, limite=LIMITE_DESTACADOS):
+    entradas = CatalogoProducto.objects.filter(tipo=tipo).order_by('id_producto')[:limite]
+    return [entrada async for entrada in entradas.aiterator()]
+
+
+async def aobtener_destacados(limite=LIMITE_DESTACADOS):
+    versiones = await cache.aget_many([clave_version_destacados(tipo) for tipo in MODELOS_CATALOGO])
+    claves_datos, nuevas_versiones = claves_destacados(versiones, limite)
+    if nuevas_versiones:
+        await cache.aset_many(nuevas_versiones, None)
+
+    en_cache = await cache.aget_many(claves_datos.values())
+    faltantes = [tipo for tipo, clave in claves_datos.items() if clave not in en_cache]
+    if faltantes:
+        calculados = await asyncio.gather(*(adestacados_de_tipo(tipo, limite) for tipo in faltantes))
+        nuevos = {claves_datos[tipo]: entradas for tipo, entradas in zip(faltantes, calculados)}
+        await cache.aset_many(nuevos, None)
+        en_cache.update(nuevos)
+    return unir_destacados(claves_datos, en_cache)
+
+
+def validadores_tipo(tipo):
+    modelo = MODELOS_CATALOGO[tipo]
+    ultimo = modelo.objects.order_by('-actualizado').values('actualizado')[:1]
+    fila = ContadorEntidad.objects.filter(entidad=tipo).annotate(ultimo=Subquery(ultimo)).values_list(
+        'total', 'ultimo'
+    ).first()
+    if fila is None:
+        datos = modelo.objects.aggregate(total=Count('pk'), ultimo=Max('actualizado'))
+        fila = (datos['total'], datos['ultimo'])
+    total, ultimo = fila
+    return f'{tipo}:{total}:{ultimo.isoformat() if ultimo else ""}', ultimo
+
+
+def validadores_producto(tipo, pk):
+    ultimo = MODELOS_CATALOGO[tipo].objects.filter(pk=pk).values_list('actualizado', flat=True).first()
+    if ultimo is None:
+        return None
+    return f'{tipo}:{pk}:{ultimo.isoformat()}', ultimo
+
+
+def consulta_grupos_facetas(tipo, precio_min=None, precio_max=None):
+    en_rango = Q()
+    if precio_min is not None:
+        en_rango &= Q(precio__gte=precio_min)
+    if precio_max is not None:
+        en_rango &= Q(precio__lte=precio_max)
+    # Un solo GROUP BY sobre el índice de facetas; el rango de precios solo afecta los conteos.
+    return CatalogoProducto.objects.filter(tipo=tipo).values(*CAMPOS_FACETA).annotate(
+        total=Count('id', filter=en_rango or None),
+        minimo=Min('precio'),
+        maximo=Max('precio'),
+    ).order_by(*CAMPOS_FACETA)
+
+
+def clave_facetas(version, tipo, precio_min, precio_max):
+    return f'facetas:{version}:{tipo}:{precio_min or ""}:{precio_max or ""}'
+
+
+def resumir_facetas(grupos, facetas, seleccion):
+    conteos = {campo: {} for campo in facetas}
+    total = 0
+    minimo = maximo = None
+    for grupo in grupos:
+        coincide = {campo: not seleccion.get(campo) or grupo[campo] in seleccion[campo] for campo in facetas}
+        # Cada faceta se cuenta con los filtros de las demás para poder ampliar la selección.
+        for campo in facetas:
+            if all(valor for otro, valor in coincide.items() if otro != campo):
+                conteos[campo][grupo[campo]] = conteos[campo].get(grupo[campo], 0) + grupo['total']
+        if all(coincide.values()):
+            total += grupo['total']
+            minimo = grupo['minimo'] if minimo is None else min(minimo, grupo['minimo'])
+            maximo = grupo['maximo'] if maximo is None else max(maximo, grupo['maximo'])
+    return {
+        'conteos': {campo: sorted(valores.items()) for campo, valores in conteos.items()},
+        'total': total,
+        'precio_minimo': minimo,
+        'precio_maximo': maximo,
+    }
+
+
+def obtener_facetas(tipo, facetas, seleccion, precio_min=None, precio_max=None):
+    clave = clave_facetas(version_catalogo(), tipo, precio_min, precio_max)
+    grupos = cache.get(clave)
+    if grupos is None:
+        grupos = list(consulta_grupos_facetas(tipo, precio_min, precio_max))
+        cache.set(clave, grupos, None)
+    return resumir_facetas(grupos, facetas, seleccion)
+
+
+async def aobtener_facetas(tipo, facetas, seleccion, precio_min=None, precio_max=None):
+    clave = clave_facetas(await aversion_catalogo(), tipo, precio_min, precio_max)
+    grupos = await cache.aget(clave)
+    if grupos is None:
+        grupos = [grupo async for grupo in consulta_grupos_facetas(tipo, precio_min, precio_max)]
+        await cache.aset(clave, grupos, None)
+    return resumir_facetas(grupos, facetas, seleccion)
+
+
+def consulta_fts(termino):
+    palabras = re.findall(r'\w+', termino)
+    return ' '.join(f'"{palabra}"*' for palabra in palabras)
+
+
+def buscar_en_catalogo(termino, limite=LIMITE_BUSQUEDA):
+    if connection.vendor != 'sqlite':
+        return list(CatalogoProducto.objects.filter(
+            Q(nombre__icontains=termino) |
+            Q(categoria__icontains=termino)
+        ).order_by('precio', 'id')[:limite])
+    consulta = consulta_fts(termino)
+    if not consulta:
+        return []
+    tabla = CatalogoProducto._meta.db_table
+    return list(CatalogoProducto.objects.raw(
+        f'SELECT {tabla}.* FROM {TABLA_FTS} '
+        f'JOIN {tabla} ON {tabla}.id = {TABLA_FTS}.rowid '
+        f'WHERE {TABLA_FTS} MATCH %s '
+        f'ORDER BY bm25({TABLA_FTS}, 10.0, 4.0, 1.0, 1.0) '
+        f'LIMIT %s',
+        [consulta, limite],
+    ))
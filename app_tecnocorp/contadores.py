@@ -0,0 +1,50 @@
+from django.db import transaction
+from django.db.models import F
+
+from .catalogo import MODELOS_CATALOGO
+from .models import ContadorEntidad, Pedido, Proveedor, Usuario
+
+MODELOS_CONTADOS = {
+    **MODELOS_CATALOGO,
+    'proveedores': Proveedor,
+    'pedidos': Pedido,
+    'usuarios': Usuario,
+}
+
+ENTIDADES_POR_MODELO = {modelo: entidad for entidad, modelo in MODELOS_CONTADOS.items()}
+
+
+def recalcular_contadores(entidades=None):
+    entidades = list(entidades or MODELOS_CONTADOS)
+    contadores = [
+        ContadorEntidad(entidad=entidad, total=MODELOS_CONTADOS[entidad].objects.count())
+        for entidad in entidades
+    ]
+    ContadorEntidad.objects.bulk_create(
+        contadores,
+        update_conflicts=True,
+        unique_fields=['entidad'],
+        update_fields=['total'],
+    )
+    return {contador.entidad: contador.total for contador in contadores}
+
+
+def actualizar_contador(entidad, delta):
+    filas = ContadorEntidad.objects.filter(entidad=entidad).update(total=F('total') + delta)
+    if not filas:
+        recalcular_contadores([entidad])
+
+
+def reconciliar_contadores():
+    with transaction.atomic():
+        anteriores = dict(ContadorEntidad.objects.values_list('entidad', 'total'))
+        actuales = recalcular_contadores()
+    return {entidad: (anteriores.get(entidad), total) for entidad, total in actuales.items()}
+
+
+def obtener_totales():
+    totales = dict(ContadorEntidad.objects.filter(entidad__in=MODELOS_CONTADOS).values_list('entidad', 'total'))
+    faltantes = [entidad for entidad in MODELOS_CONTADOS if entidad not in totales]
+    if faltantes:
+        totales.update(recalcular_contadores(faltantes))
+    return totales
@@ -0,0 +1,8 @@
+from .cache_paginas import MARCADOR_CSRF
+
+
+def csrf_pagina_en_cache(request):
+    # Las páginas compartidas se guardan con un marcador; cache_pagina_anonima pone el token de cada visitante.
+    if getattr(request, 'pagina_en_cache', False):
+        return {'csrf_token': MARCADOR_CSRF}
+    return {}
@@ -0,0 +1,53 @@
+import csv
+import zlib
+
+TAMAÑO_BLOQUE_CONSULTA = 2000
+TAMAÑO_BLOQUE_SALIDA = 64 * 1024
+
+COLUMNAS_PEDIDOS = [
+    'id_pedido', 'usuario', 'correo', 'fecha_pedido', 'fecha_entrega', 'estado', 'precio', 'id_producto', 'detalles',
+]
+
+
+class Eco:
+    def write(self, valor):
+        return valor
+
+
+def filas_pedido(pedido):
+    return [
+        pedido.id_pedido,
+        pedido.usuario.usuario,
+        pedido.usuario.correo,
+        pedido.fecha_pedido.isoformat(),
+        pedido.fecha_entrega.isoformat() if pedido.fecha_entrega else '',
+        pedido.estado,
+        pedido.precio,
+        pedido.id_producto,
+        pedido.detalles,
+    ]
+
+
+def csv_pedidos(pedidos):
+    escritor = csv.writer(Eco())
+    bloque = [escritor.writerow(COLUMNAS_PEDIDOS)]
+    tamaño = 0
+    for pedido in pedidos.iterator(chunk_size=TAMAÑO_BLOQUE_CONSULTA):
+        fila = escritor.writerow(filas_pedido(pedido))
+        bloque.append(fila)
+        tamaño += len(fila)
+        if tamaño >= TAMAÑO_BLOQUE_SALIDA:
+            yield ''.join(bloque).encode('utf-8')
+            bloque = []
+            tamaño = 0
+    if bloque:
+        yield ''.join(bloque).encode('utf-8')
+
+
+def comprimir_gzip(fragmentos):
+    compresor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for fragmento in fragmentos:
+        datos = compresor.compress(fragmento)
+        if datos:
+            yield datos
+    yield compresor.flush()
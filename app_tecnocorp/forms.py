@@ -1,5 +1,8 @@
+from datetime import datetime, time, timedelta
+
 from django import forms
 from django.contrib.auth import authenticate
+from django.utils import timezone
 from .models import (
     Usuario, PCArmada, Teclado, Monitor, Mouse, Audifonos, Proveedor, Pedido
 )
@@ -100,6 +103,121 @@ class FormularioBusqueda(forms.Form):
     busqueda = forms.CharField(max_length=100, required=False, label='Buscar')
 
 
+ETIQUETAS_FACETAS = {
+    'categoria': 'Categoría',
+    'tamaño': 'Tamaño',
+    'color': 'Color',
+}
+
+ORDENES_PRECIO = [
+    ('precio', 'Precio: menor a mayor'),
+    ('-precio', 'Precio: mayor a menor'),
+]
+
+MAXIMO_VALORES_FACETA = 20
+
+
+class CampoValoresFaceta(forms.Field):
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, valor):
+        if not valor:
+            return []
+        valores = {texto.strip() for texto in valor if isinstance(texto, str) and texto.strip()}
+        if len(valores) > MAXIMO_VALORES_FACETA:
+            raise forms.ValidationError('Demasiados valores seleccionados.')
+        return sorted(valores)
+
+
+class FormularioFacetas(forms.Form):
+    precio_min = forms.DecimalField(required=False, min_value=0, max_digits=10, decimal_places=2, label='Desde $')
+    precio_max = forms.DecimalField(required=False, min_value=0, max_digits=10, decimal_places=2, label='Hasta $')
+    orden = forms.ChoiceField(choices=ORDENES_PRECIO, required=False, label='Ordenar')
+
+    def __init__(self, *args, facetas=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.facetas = list(facetas)
+        for campo in self.facetas:
+            self.fields[campo] = CampoValoresFaceta(required=False, label=ETIQUETAS_FACETAS[campo])
+
+    def seleccion(self):
+        return {campo: self.cleaned_data.get(campo) or [] for campo in self.facetas}
+
+    def rango_precio(self):
+        return self.cleaned_data.get('precio_min'), self.cleaned_data.get('precio_max')
+
+    def orden_keyset(self):
+        if self.cleaned_data.get('orden') == '-precio':
+            return ('-precio', '-pk')
+        return ('precio', 'pk')
+
+    def filtrar(self, productos):
+        for campo, valores in self.seleccion().items():
+            if valores:
+                productos = productos.filter(**{f'{campo}__in': valores})
+        precio_min, precio_max = self.rango_precio()
+        if precio_min is not None:
+            productos = productos.filter(precio__gte=precio_min)
+        if precio_max is not None:
+            productos = productos.filter(precio__lte=precio_max)
+        return productos
+
+
+def inicio_del_dia(fecha):
+    return timezone.make_aware(datetime.combine(fecha, time.min))
+
+
+class FormularioFiltroPedidos(forms.Form):
+    estado = forms.ChoiceField(choices=[('', 'Todos')] + Pedido.ESTADOS, required=False, label='Estado')
+    desde = forms.DateField(required=False, label='Desde', widget=forms.DateInput(attrs={'type': 'date'}))
+    hasta = forms.DateField(required=False, label='Hasta', widget=forms.DateInput(attrs={'type': 'date'}))
+
+    def filtrar(self, pedidos):
+        datos = self.cleaned_data
+        if datos.get('estado'):
+            pedidos = pedidos.filter(estado=datos['estado'])
+        if datos.get('desde'):
+            pedidos = pedidos.filter(fecha_pedido__gte=inicio_del_dia(datos['desde']))
+        if datos.get('hasta'):
+            pedidos = pedidos.filter(fecha_pedido__lt=inicio_del_dia(datos['hasta'] + timedelta(days=1)))
+        return pedidos
+
+
+class CampoIdsPedido(forms.Field):
+    widget = forms.MultipleHiddenInput
+    campo_id = forms.IntegerField(min_value=1, max_value=2 ** 63 - 1)
+
+    def to_python(self, valor):
+        if not valor:
+            return []
+        try:
+            return [self.campo_id.clean(id_pedido) for id_pedido in valor]
+        except forms.ValidationError:
+            raise forms.ValidationError('Selección de pedidos inválida.')
+
+
+class FormularioEstadoMasivo(FormularioFiltroPedidos):
+    nuevo_estado = forms.ChoiceField(choices=Pedido.ESTADOS, label='Nuevo estado')
+    fecha_entrega = forms.DateTimeField(
+        required=False,
+        label='Fecha de entrega',
+        widget=forms.DateTimeInput(attrs={'type': 'datetime-local'}),
+    )
+    pedidos = CampoIdsPedido(required=False)
+
+    def clean(self):
+        datos = super().clean()
+        filtros = [datos.get('estado'), datos.get('desde'), datos.get('hasta')]
+        if not datos.get('pedidos') and not any(filtros):
+            raise forms.ValidationError('Selecciona pedidos o indica un filtro.')
+        return datos
+
+    def pedidos_seleccionados(self):
+        if self.cleaned_data['pedidos']:
+            return Pedido.objects.filter(id_pedido__in=self.cleaned_data['pedidos'])
+        return self.filtrar(Pedido.objects.all())
+
+
 class FormularioEstadoPedido(forms.ModelForm):
     class Meta:
         model = Pedido
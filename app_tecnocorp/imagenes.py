@@ -0,0 +1,124 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+ANCHOS_DERIVADOS = (240, 480, 800)
+
+FORMATOS_DERIVADOS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+CARPETA_DERIVADOS = 'derivados'
+
+ORIENTACION_EXIF = 0x0112
+ORIENTACIONES_GIRADAS = {5, 6, 7, 8}
+
+ejecutor_derivados = ThreadPoolExecutor(max_workers=2, thread_name_prefix='derivados')
+
+
+def nombre_derivado(nombre, ancho, extension):
+    # Se conserva la extensión original: images.jpg e images.jfif no deben compartir derivados.
+    return f'{CARPETA_DERIVADOS}/{nombre}-{ancho}.{extension}'
+
+
+def clave_derivados(nombre):
+    return f'derivados:{nombre}'
+
+
+def derivados_existentes(nombre):
+    clave = clave_derivados(nombre)
+    anchos = cache.get(clave)
+    if anchos is None:
+        anchos = [
+            ancho for ancho in ANCHOS_DERIVADOS
+            if default_storage.exists(nombre_derivado(nombre, ancho, 'webp'))
+        ]
+        cache.set(clave, anchos, None)
+    return anchos
+
+
+def clave_ancho_original(nombre):
+    return f'ancho_original:{nombre}'
+
+
+def ancho_original(nombre):
+    clave = clave_ancho_original(nombre)
+    ancho = cache.get(clave)
+    if ancho is None:
+        try:
+            with default_storage.open(nombre, 'rb') as archivo:
+                imagen = Image.open(archivo)
+                # Solo se lee la cabecera; una foto girada por EXIF se muestra con el alto como ancho.
+                girada = imagen.getexif().get(ORIENTACION_EXIF) in ORIENTACIONES_GIRADAS
+                ancho = imagen.height if girada else imagen.width
+        except (OSError, UnidentifiedImageError):
+            ancho = 0
+        cache.set(clave, ancho, None)
+    return ancho
+
+
+def guardar_derivado(imagen, nombre, formato, opciones):
+    contenido = BytesIO()
+    imagen.save(contenido, formato, **opciones)
+    if default_storage.exists(nombre):
+        default_storage.delete(nombre)
+    default_storage.save(nombre, ContentFile(contenido.getvalue()))
+
+
+def generar_derivados(nombre):
+    with default_storage.open(nombre, 'rb') as archivo:
+        original = Image.open(archivo)
+        original.load()
+    original = ImageOps.exif_transpose(original)
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA' if 'transparency' in original.info else 'RGB')
+
+    generados = []
+    for ancho in ANCHOS_DERIVADOS:
+        if ancho >= original.width:
+            break
+        alto = round(original.height * ancho / original.width)
+        reducida = original.resize((ancho, alto), Image.LANCZOS)
+        for extension, (formato, opciones) in FORMATOS_DERIVADOS.items():
+            imagen = reducida.convert('RGB') if formato == 'JPEG' else reducida
+            guardar_derivado(imagen, nombre_derivado(nombre, ancho, extension), formato, opciones)
+        generados.append(ancho)
+    cache.set(clave_derivados(nombre), generados, None)
+    cache.set(clave_ancho_original(nombre), original.width, None)
+    return generados
+
+
+def eliminar_derivados(nombre):
+    for ancho in ANCHOS_DERIVADOS:
+        for extension in FORMATOS_DERIVADOS:
+            derivado = nombre_derivado(nombre, ancho, extension)
+            if default_storage.exists(derivado):
+                default_storage.delete(derivado)
+    cache.delete_many([clave_derivados(nombre), clave_ancho_original(nombre)])
+
+
+def generar_derivados_seguro(nombre):
+    try:
+        return generar_derivados(nombre)
+    except (OSError, UnidentifiedImageError):
+        logger.exception('No se pudieron generar los derivados de %s', nombre)
+        return []
+
+
+def programar_eliminacion_derivados(nombre):
+    return ejecutor_derivados.submit(eliminar_derivados, nombre)
+
+
+def programar_derivados(nombre, al_terminar=None):
+    futuro = ejecutor_derivados.submit(generar_derivados_seguro, nombre)
+    if al_terminar is not None:
+        futuro.add_done_callback(lambda _: al_terminar())
+    return futuro
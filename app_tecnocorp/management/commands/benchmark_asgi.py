@@ -0,0 +1,142 @@
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.urls import reverse
+
+from app_tecnocorp.models import CatalogoProducto
+
+SERVIDOR = 'localhost'
+
+
+def rutas_catalogo():
+    rutas = [reverse('index'), reverse('lista_productos'), f"{reverse('lista_productos')}?busqueda=gamer"]
+    entrada = CatalogoProducto.objects.order_by('id').first()
+    if entrada:
+        rutas.append(reverse('productos_por_tipo', args=[entrada.tipo]))
+        rutas.append(reverse('detalle_producto', args=[entrada.tipo, entrada.id_producto]))
+    return rutas
+
+
+def medir_wsgi(rutas, clientes, peticiones):
+    manejador = WSGIHandler()
+    fabrica = RequestFactory(SERVER_NAME=SERVIDOR)
+
+    def peticion(ruta):
+        entorno = fabrica.get(ruta).environ
+        inicio = time.perf_counter()
+        respuesta = manejador(entorno, lambda estado, cabeceras: None)
+        b''.join(respuesta)
+        respuesta.close()
+        return time.perf_counter() - inicio
+
+    def cliente(numero):
+        return [peticion(rutas[(numero + indice) % len(rutas)]) for indice in range(peticiones)]
+
+    with ThreadPoolExecutor(max_workers=clientes) as ejecutor:
+        return [latencia for latencias in ejecutor.map(cliente, range(clientes)) for latencia in latencias]
+
+
+def medir_asgi(rutas, clientes, peticiones):
+    manejador = ASGIHandler()
+
+    async def peticion(ruta):
+        camino, _, consulta = ruta.partition('?')
+        alcance = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': camino,
+            'raw_path': camino.encode(),
+            'query_string': consulta.encode(),
+            'root_path': '',
+            'headers': [(b'host', SERVIDOR.encode())],
+            'client': ('127.0.0.1', 0),
+            'server': (SERVIDOR, 80),
+        }
+        recibido = asyncio.Event()
+        terminado = asyncio.Event()
+
+        async def recibir():
+            if not recibido.is_set():
+                recibido.set()
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await terminado.wait()
+            return {'type': 'http.disconnect'}
+
+        async def enviar(mensaje):
+            if mensaje['type'] == 'http.response.body' and not mensaje.get('more_body'):
+                terminado.set()
+
+        inicio = time.perf_counter()
+        await manejador(alcance, recibir, enviar)
+        return time.perf_counter() - inicio
+
+    async def cliente(numero):
+        return [await peticion(rutas[(numero + indice) % len(rutas)]) for indice in range(peticiones)]
+
+    async def todos():
+        resultados = await asyncio.gather(*(cliente(numero) for numero in range(clientes)))
+        return [latencia for latencias in resultados for latencia in latencias]
+
+    return asyncio.run(todos())
+
+
+class Command(BaseCommand):
+    help = 'Compara la latencia p50/p99 de las vistas del catálogo bajo WSGI y bajo ASGI con clientes concurrentes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=16, help='Clientes concurrentes.')
+        parser.add_argument('--peticiones', type=int, default=50, help='Peticiones por cliente.')
+        parser.add_argument('--modo', choices=['wsgi', 'asgi'], help='Mide solo un modo en este proceso.')
+
+    def handle(self, *args, **opciones):
+        if opciones['modo']:
+            self.medir(opciones['modo'], opciones['clientes'], opciones['peticiones'])
+            return
+        # Cada modo corre en su propio proceso para cargar las URLs con las vistas que le corresponden.
+        for modo in ('wsgi', 'asgi'):
+            entorno = {
+                **os.environ,
+                'PYTHONPATH': os.pathsep.join(sys.path),
+                'TECNOCORP_VISTAS_ASINCRONAS': '1' if modo == 'asgi' else '0',
+            }
+            proceso = subprocess.run(
+                [
+                    sys.executable, '-m', 'django', 'benchmark_asgi',
+                    '--modo', modo,
+                    '--clientes', str(opciones['clientes']),
+                    '--peticiones', str(opciones['peticiones']),
+                ],
+                env=entorno,
+                capture_output=True,
+                text=True,
+            )
+            if proceso.returncode:
+                raise CommandError(proceso.stderr)
+            self.stdout.write(proceso.stdout.rstrip())
+
+    def medir(self, modo, clientes, peticiones):
+        rutas = rutas_catalogo()
+        medidor = medir_asgi if modo == 'asgi' else medir_wsgi
+        medidor(rutas, 1, len(rutas))
+        inicio = time.perf_counter()
+        latencias = medidor(rutas, clientes, peticiones)
+        duracion = time.perf_counter() - inicio
+        cuantiles = statistics.quantiles(latencias, n=100)
+        self.stdout.write(
+            f'{modo}: {len(latencias)} peticiones, '
+            f'p50 {cuantiles[49] * 1000:.1f} ms, '
+            f'p99 {cuantiles[98] * 1000:.1f} ms, '
+            f'{len(latencias) / duracion:.0f} peticiones/s'
+        )
@@ -0,0 +1,163 @@
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app_tecnocorp.transacciones import MODO_ESCRITURA
+
+ESQUEMA = [
+    'CREATE TABLE producto (id INTEGER PRIMARY KEY, precio NUMERIC NOT NULL)',
+    'CREATE TABLE pedido (id INTEGER PRIMARY KEY, usuario INTEGER NOT NULL, precio NUMERIC NOT NULL, fecha TEXT NOT NULL)',
+    'CREATE TABLE linea (id INTEGER PRIMARY KEY, pedido INTEGER NOT NULL, producto INTEGER NOT NULL, cantidad INTEGER NOT NULL)',
+    'CREATE INDEX linea_pedido ON linea (pedido)',
+    'CREATE TABLE venta (fecha TEXT PRIMARY KEY, pedidos INTEGER NOT NULL, ingresos NUMERIC NOT NULL)',
+]
+
+PERFIL_ORIGINAL = {
+    'pragmas': {},
+    'modo': 'DEFERRED',
+    'timeout': 5,
+}
+
+
+def perfil_produccion():
+    opciones = settings.DATABASES['default'].get('OPTIONS', {})
+    return {
+        'pragmas': settings.PRAGMAS_SQLITE,
+        'modo': MODO_ESCRITURA,
+        'timeout': opciones.get('timeout', 5),
+    }
+
+
+def conectar(ruta, perfil):
+    conexion = sqlite3.connect(ruta, timeout=perfil['timeout'], isolation_level=None, check_same_thread=False)
+    for nombre, valor in perfil['pragmas'].items():
+        conexion.execute(f'PRAGMA {nombre}={valor}')
+    return conexion
+
+
+def preparar_base(ruta, perfil, productos):
+    conexion = conectar(ruta, perfil)
+    for sentencia in ESQUEMA:
+        conexion.execute(sentencia)
+    conexion.execute('BEGIN')
+    conexion.executemany(
+        'INSERT INTO producto (id, precio) VALUES (?, ?)',
+        [(indice, 100 + indice % 50) for indice in range(1, productos + 1)],
+    )
+    conexion.execute('COMMIT')
+    conexion.close()
+
+
+class Resultado:
+    def __init__(self):
+        self.bloqueo = threading.Lock()
+        self.confirmadas = 0
+        self.bloqueadas = 0
+        self.lecturas = 0
+
+    def sumar(self, campo, cantidad=1):
+        with self.bloqueo:
+            setattr(self, campo, getattr(self, campo) + cantidad)
+
+
+def escribir(ruta, perfil, transacciones, lineas, productos, resultado, semilla):
+    conexion = conectar(ruta, perfil)
+    for numero in range(transacciones):
+        producto = (semilla * transacciones + numero) % productos + 1
+        try:
+            conexion.execute(f'BEGIN {perfil["modo"]}')
+            precio = conexion.execute('SELECT precio FROM producto WHERE id = ?', [producto]).fetchone()[0]
+            cursor = conexion.execute(
+                "INSERT INTO pedido (usuario, precio, fecha) VALUES (?, ?, datetime('now'))",
+                [semilla, precio * lineas],
+            )
+            conexion.executemany(
+                'INSERT INTO linea (pedido, producto, cantidad) VALUES (?, ?, 1)',
+                [(cursor.lastrowid, producto)] * lineas,
+            )
+            conexion.execute(
+                "INSERT INTO venta (fecha, pedidos, ingresos) VALUES (date('now'), 1, ?) "
+                'ON CONFLICT (fecha) DO UPDATE SET pedidos = pedidos + 1, ingresos = ingresos + excluded.ingresos',
+                [precio * lineas],
+            )
+            conexion.execute('COMMIT')
+            resultado.sumar('confirmadas')
+        except sqlite3.OperationalError:
+            if conexion.in_transaction:
+                conexion.execute('ROLLBACK')
+            resultado.sumar('bloqueadas')
+    conexion.close()
+
+
+def leer(ruta, perfil, productos, resultado, detener):
+    conexion = conectar(ruta, perfil)
+    while not detener.is_set():
+        try:
+            conexion.execute(
+                'SELECT COUNT(*), SUM(precio) FROM producto WHERE id <= ?', [productos // 2]
+            ).fetchone()
+            resultado.sumar('lecturas')
+        except sqlite3.OperationalError:
+            pass
+    conexion.close()
+
+
+def medir(ruta, perfil, hilos, transacciones, lineas, productos, lectores):
+    preparar_base(ruta, perfil, productos)
+    resultado = Resultado()
+    detener = threading.Event()
+    escritores = [
+        threading.Thread(target=escribir, args=(ruta, perfil, transacciones, lineas, productos, resultado, semilla))
+        for semilla in range(hilos)
+    ]
+    lectores = [
+        threading.Thread(target=leer, args=(ruta, perfil, productos, resultado, detener))
+        for _ in range(lectores)
+    ]
+    inicio = time.perf_counter()
+    for hilo in escritores + lectores:
+        hilo.start()
+    for hilo in escritores:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+    detener.set()
+    for hilo in lectores:
+        hilo.join()
+    return resultado, duracion
+
+
+class Command(BaseCommand):
+    help = 'Compara el rendimiento de escrituras concurrentes con el perfil SQLite original y el de producción.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=8, help='Hilos escritores concurrentes.')
+        parser.add_argument('--transacciones', type=int, default=200, help='Transacciones por hilo.')
+        parser.add_argument('--lineas', type=int, default=3, help='Líneas por pedido.')
+        parser.add_argument('--productos', type=int, default=1000, help='Productos en la base de prueba.')
+        parser.add_argument('--lectores', type=int, default=2, help='Hilos lectores concurrentes.')
+
+    def handle(self, *args, **opciones):
+        perfiles = [('original', PERFIL_ORIGINAL), ('producción', perfil_produccion())]
+        with tempfile.TemporaryDirectory() as carpeta:
+            for nombre, perfil in perfiles:
+                resultado, duracion = medir(
+                    str(Path(carpeta) / f'{nombre}.sqlite3'),
+                    perfil,
+                    opciones['hilos'],
+                    opciones['transacciones'],
+                    opciones['lineas'],
+                    opciones['productos'],
+                    opciones['lectores'],
+                )
+                self.stdout.write(
+                    f'{nombre}: {resultado.confirmadas} confirmadas, '
+                    f'{resultado.bloqueadas} bloqueadas, '
+                    f'{resultado.confirmadas / duracion:.0f} escrituras/s, '
+                    f'{resultado.lecturas / duracion:.0f} lecturas/s '
+                    f'({duracion:.2f} s)'
+                )
@@ -0,0 +1,48 @@
+import csv
+import json
+import sys
+import time
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand
+
+from app_tecnocorp.views import MAPEO_PRODUCTOS
+
+FORMATOS = ('csv', 'jsonl')
+
+
+class Command(BaseCommand):
+    help = 'Exporta los productos de un tipo a CSV o JSONL en flujo.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tipo', choices=list(MAPEO_PRODUCTOS), help='Tipo de producto a exportar.')
+        parser.add_argument('--formato', choices=FORMATOS, default='csv')
+        parser.add_argument('--salida', default='-', help="Ruta del archivo o '-' para la salida estándar.")
+        parser.add_argument('--lote', type=int, default=2000, help='Filas leídas por consulta.')
+
+    def handle(self, *args, **opciones):
+        modelo = MAPEO_PRODUCTOS[opciones['tipo']]['modelo']
+        campos = [campo.attname for campo in modelo._meta.concrete_fields]
+        filas = modelo.objects.order_by('pk').values_list(*campos).iterator(chunk_size=opciones['lote'])
+
+        salida = opciones['salida']
+        contexto = nullcontext(sys.stdout) if salida == '-' else open(salida, 'w', newline='', encoding='utf-8')
+        total = 0
+        inicio = time.monotonic()
+        with contexto as archivo:
+            if opciones['formato'] == 'csv':
+                escritor = csv.writer(archivo)
+                escritor.writerow(campos)
+            for fila in filas:
+                if opciones['formato'] == 'csv':
+                    escritor.writerow(fila)
+                else:
+                    archivo.write(json.dumps(dict(zip(campos, fila)), default=str, ensure_ascii=False) + '\n')
+                total += 1
+                if total % opciones['lote'] == 0:
+                    self.progreso(total, inicio)
+        self.progreso(total, inicio)
+
+    def progreso(self, total, inicio):
+        transcurrido = max(time.monotonic() - inicio, 1e-6)
+        self.stderr.write(f'{total} productos exportados ({total / transcurrido:.0f} filas/s)')
@@ -0,0 +1,30 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from app_tecnocorp.catalogo import MODELOS_CATALOGO
+from app_tecnocorp.imagenes import derivados_existentes, generar_derivados_seguro
+
+
+class Command(BaseCommand):
+    help = 'Genera las imágenes derivadas (WebP/JPEG por ancho) de las fotos de producto existentes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=4, help='Número de hilos de trabajo.')
+        parser.add_argument('--forzar', action='store_true', help='Regenera aunque ya existan derivados.')
+
+    def handle(self, *args, **opciones):
+        nombres = set()
+        for modelo in MODELOS_CATALOGO.values():
+            nombres.update(
+                modelo.objects.exclude(foto='').exclude(foto__isnull=True).values_list('foto', flat=True)
+            )
+        if not opciones['forzar']:
+            nombres = {nombre for nombre in nombres if not derivados_existentes(nombre)}
+
+        total = 0
+        with ThreadPoolExecutor(max_workers=opciones['hilos']) as ejecutor:
+            for nombre, anchos in zip(nombres, ejecutor.map(generar_derivados_seguro, nombres)):
+                total += len(anchos)
+                self.stdout.write(f'{nombre}: {", ".join(map(str, anchos)) or "sin derivados"}')
+        self.stdout.write(self.style.SUCCESS(f'{len(nombres)} fotos procesadas, {total} anchos generados.'))
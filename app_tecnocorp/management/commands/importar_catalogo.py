@@ -0,0 +1,143 @@
+import csv
+import json
+import sys
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from app_tecnocorp.catalogo import invalidar_catalogo, sincronizar_productos
+from app_tecnocorp.contadores import recalcular_contadores
+from app_tecnocorp.views import MAPEO_PRODUCTOS
+
+FORMATOS = ('csv', 'jsonl')
+
+
+def leer_filas(archivo, formato):
+    if formato == 'csv':
+        lector = csv.DictReader(archivo)
+        for fila in lector:
+            yield lector.line_num, fila, ''
+        return
+    for numero, linea in enumerate(archivo, start=1):
+        linea = linea.strip()
+        if not linea:
+            continue
+        try:
+            fila = json.loads(linea)
+        except json.JSONDecodeError as error:
+            yield numero, None, f'JSON inválido: {error.msg}'
+            continue
+        if not isinstance(fila, dict):
+            yield numero, None, 'Se esperaba un objeto JSON.'
+            continue
+        yield numero, fila, ''
+
+
+class Command(BaseCommand):
+    help = 'Importa productos desde un CSV o JSONL en flujo, validando cada fila y actualizando por lotes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tipo', choices=list(MAPEO_PRODUCTOS), help='Tipo de producto a importar.')
+        parser.add_argument('archivo', help="Ruta del archivo o '-' para leer de la entrada estándar.")
+        parser.add_argument('--formato', choices=FORMATOS, help='Formato del archivo; se deduce de la extensión.')
+        parser.add_argument('--lote', type=int, default=1000, help='Filas por lote de inserción.')
+        parser.add_argument('--max-errores', type=int, default=100, help='Errores a mostrar antes de callar.')
+
+    def handle(self, *args, **opciones):
+        tipo = opciones['tipo']
+        archivo = opciones['archivo']
+        formato = opciones['formato'] or Path(archivo).suffix.lstrip('.').lower()
+        if formato not in FORMATOS:
+            raise CommandError('Indica --formato csv o --formato jsonl.')
+
+        self.modelo = MAPEO_PRODUCTOS[tipo]['modelo']
+        self.formulario_clase = MAPEO_PRODUCTOS[tipo]['formulario']
+        self.tipo = tipo
+        self.campo_pk = self.modelo._meta.pk.name
+        self.campos_actualizables = [
+            campo.name for campo in self.modelo._meta.concrete_fields if not campo.primary_key
+        ]
+        self.campos_formulario = set(self.formulario_clase.base_fields)
+
+        lote = []
+        procesadas = 0
+        importadas = 0
+        errores = 0
+        inicio = time.monotonic()
+        contexto = nullcontext(sys.stdin) if archivo == '-' else open(archivo, newline='', encoding='utf-8')
+        with contexto as entrada:
+            for numero, fila, mensaje in leer_filas(entrada, formato):
+                procesadas += 1
+                objeto = None
+                if fila is not None:
+                    objeto, mensaje = self.validar(fila)
+                if objeto is None:
+                    errores += 1
+                    if errores <= opciones['max_errores']:
+                        self.stderr.write(f'Línea {numero}: {mensaje}')
+                    continue
+                lote.append((self.campos_de(fila), objeto))
+                if len(lote) >= opciones['lote']:
+                    importadas += self.guardar(lote)
+                    lote = []
+                    self.progreso(procesadas, importadas, errores, inicio)
+            if lote:
+                importadas += self.guardar(lote)
+
+        invalidar_catalogo(tipo)
+        recalcular_contadores([tipo])
+        self.progreso(procesadas, importadas, errores, inicio)
+        self.stdout.write(self.style.SUCCESS(f'Importación terminada: {importadas} productos, {errores} errores.'))
+
+    def validar(self, fila):
+        formulario = self.formulario_clase(data=fila)
+        if not formulario.is_valid():
+            return None, formulario.errors.as_text().replace('\n', ' ')
+        objeto = formulario.save(commit=False)
+        pk = fila.get(self.campo_pk) or fila.get('id')
+        if pk:
+            try:
+                objeto.pk = int(pk)
+            except (TypeError, ValueError):
+                return None, f'{self.campo_pk} inválido: {pk}'
+        if fila.get('foto'):
+            objeto.foto = fila['foto']
+        return objeto, ''
+
+    def campos_de(self, fila):
+        # Solo se sobrescriben las columnas que trae el archivo; las demás (p. ej. la foto) se conservan.
+        return tuple(
+            campo for campo in self.campos_actualizables
+            if campo in fila or campo not in self.campos_formulario
+        )
+
+    def guardar(self, lote):
+        grupos = defaultdict(list)
+        for campos, objeto in lote:
+            grupos[campos].append(objeto)
+        total = 0
+        with transaction.atomic():
+            for campos, objetos in grupos.items():
+                guardados = self.modelo.objects.bulk_create(
+                    objetos,
+                    update_conflicts=True,
+                    unique_fields=[self.campo_pk],
+                    update_fields=list(campos),
+                )
+                if len(campos) < len(self.campos_actualizables):
+                    # El catálogo se copia de lo guardado, no de las columnas que el archivo no traía.
+                    guardados = list(self.modelo.objects.filter(pk__in=[objeto.pk for objeto in guardados]))
+                sincronizar_productos(self.tipo, guardados)
+                total += len(objetos)
+        return total
+
+    def progreso(self, procesadas, importadas, errores, inicio):
+        transcurrido = max(time.monotonic() - inicio, 1e-6)
+        self.stdout.write(
+            f'{procesadas} filas leídas, {importadas} importadas, {errores} errores '
+            f'({procesadas / transcurrido:.0f} filas/s)'
+        )
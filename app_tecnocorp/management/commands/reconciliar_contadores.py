@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from app_tecnocorp.contadores import reconciliar_contadores
+
+
+class Command(BaseCommand):
+    help = 'Recalcula exactamente los contadores de entidades del panel administrador.'
+
+    def handle(self, *args, **opciones):
+        for entidad, (anterior, actual) in reconciliar_contadores().items():
+            if anterior == actual:
+                self.stdout.write(f'{entidad}: {actual}')
+            else:
+                self.stdout.write(self.style.WARNING(f'{entidad}: {anterior} -> {actual}'))
+        self.stdout.write(self.style.SUCCESS('Contadores reconciliados.'))
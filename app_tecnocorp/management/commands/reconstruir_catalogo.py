@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from app_tecnocorp.catalogo import TAMAÑO_LOTE, reconstruir_catalogo
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye la tabla de catálogo a partir de los modelos de producto.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=TAMAÑO_LOTE, help='Tamaño de lote para la inserción.')
+
+    def handle(self, *args, **opciones):
+        total = reconstruir_catalogo(tamaño_lote=opciones['lote'])
+        self.stdout.write(self.style.SUCCESS(f'Catálogo reconstruido: {total} productos.'))
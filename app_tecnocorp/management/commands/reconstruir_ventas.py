@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from app_tecnocorp.ventas import reconstruir_ventas
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye las ventas diarias a partir del historial de pedidos.'
+
+    def handle(self, *args, **opciones):
+        total = reconstruir_ventas()
+        self.stdout.write(self.style.SUCCESS(f'Ventas diarias reconstruidas: {total} filas.'))
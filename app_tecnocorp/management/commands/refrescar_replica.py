@@ -0,0 +1,41 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app_tecnocorp.routers import ALIAS_REPLICA, hay_replica
+
+
+def copiar_base(origen, destino, paginas):
+    timeout = settings.PRAGMAS_SQLITE['busy_timeout'] / 1000
+    conexion_origen = sqlite3.connect(origen, timeout=timeout)
+    conexion_destino = sqlite3.connect(destino, timeout=timeout)
+    try:
+        conexion_origen.backup(conexion_destino, pages=paginas)
+    finally:
+        conexion_destino.close()
+        conexion_origen.close()
+
+
+class Command(BaseCommand):
+    help = 'Copia la base principal sobre la réplica SQLite de solo lectura usando la API de respaldo en línea.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--paginas', type=int, default=-1, help='Páginas copiadas por paso; -1 copia todo en un paso.')
+        parser.add_argument('--cada', type=float, default=0, help='Repite la copia cada N segundos.')
+
+    def handle(self, *args, **opciones):
+        if not hay_replica():
+            raise CommandError('Define TECNOCORP_REPLICA_SQLITE para configurar la réplica.')
+        origen = str(settings.DATABASES['default']['NAME'])
+        destino = str(settings.DATABASES[ALIAS_REPLICA]['NAME'])
+        while True:
+            inicio = time.perf_counter()
+            copiar_base(origen, destino, opciones['paginas'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Réplica actualizada en {time.perf_counter() - inicio:.2f} s: {destino}'
+            ))
+            if opciones['cada'] <= 0:
+                break
+            time.sleep(opciones['cada'])
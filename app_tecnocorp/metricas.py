@@ -0,0 +1,153 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LIMITES_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+HISTOGRAMAS = {
+    'tecnocorp_peticion_segundos': ('Latencia total de la petición.', LIMITES_SEGUNDOS),
+    'tecnocorp_sql_consultas': ('Consultas SQL por petición.', LIMITES_CONSULTAS),
+    'tecnocorp_sql_segundos': ('Tiempo en consultas SQL por petición.', LIMITES_SEGUNDOS),
+    'tecnocorp_plantillas_segundos': ('Tiempo de render de plantillas por petición.', LIMITES_SEGUNDOS),
+}
+
+VISTA_SIN_RUTA = 'sin_ruta'
+
+medicion_actual = ContextVar('medicion_actual', default=None)
+
+
+class Medicion:
+    def __init__(self):
+        self.consultas = 0
+        self.segundos_sql = 0.0
+        self.segundos_plantillas = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos_sql += time.perf_counter() - inicio
+            self.consultas += 1
+
+
+class Histograma:
+    def __init__(self, limites):
+        self.limites = limites
+        self.cubetas = [0] * (len(limites) + 1)
+        self.suma = 0.0
+
+    def observar(self, valor):
+        self.cubetas[bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+
+    def acumuladas(self):
+        total = 0
+        for limite, cantidad in zip(self.limites + ('+Inf',), self.cubetas):
+            total += cantidad
+            yield limite, total
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self.bloqueo = threading.Lock()
+        self.histogramas = {}
+
+    def observar(self, vista, valores):
+        with self.bloqueo:
+            for nombre, valor in valores.items():
+                clave = (nombre, vista)
+                if clave not in self.histogramas:
+                    self.histogramas[clave] = Histograma(HISTOGRAMAS[nombre][1])
+                self.histogramas[clave].observar(valor)
+
+    def texto_prometheus(self):
+        with self.bloqueo:
+            lineas = []
+            for nombre, (ayuda, _) in HISTOGRAMAS.items():
+                lineas.append(f'# HELP {nombre} {ayuda}')
+                lineas.append(f'# TYPE {nombre} histogram')
+                for (metrica, vista), histograma in sorted(self.histogramas.items()):
+                    if metrica != nombre:
+                        continue
+                    for limite, total in histograma.acumuladas():
+                        lineas.append(f'{nombre}_bucket{{vista="{vista}",le="{limite}"}} {total}')
+                    lineas.append(f'{nombre}_sum{{vista="{vista}"}} {histograma.suma}')
+                    lineas.append(f'{nombre}_count{{vista="{vista}"}} {sum(histograma.cubetas)}')
+            return '\n'.join(lineas) + '\n'
+
+
+registro = RegistroMetricas()
+
+
+def nombre_vista(request):
+    coincidencia = getattr(request, 'resolver_match', None)
+    if coincidencia is None:
+        return VISTA_SIN_RUTA
+    return coincidencia.view_name or VISTA_SIN_RUTA
+
+
+def server_timing(medicion, segundos):
+    return ', '.join([
+        f'sql;dur={medicion.segundos_sql * 1000:.1f};desc="{medicion.consultas} consultas"',
+        f'plantillas;dur={medicion.segundos_plantillas * 1000:.1f}',
+        f'total;dur={segundos * 1000:.1f}',
+    ])
+
+
+class MiddlewareMetricas:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        medicion = Medicion()
+        ficha = medicion_actual.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            with ExitStack() as pila:
+                for conexion in connections.all():
+                    pila.enter_context(conexion.execute_wrapper(medicion))
+                response = self.get_response(request)
+        finally:
+            medicion_actual.reset(ficha)
+        segundos = time.perf_counter() - inicio
+        # El cuerpo de las respuestas en streaming se envía después y no entra en la latencia.
+        response.headers['Server-Timing'] = server_timing(medicion, segundos)
+        registro.observar(nombre_vista(request), {
+            'tecnocorp_peticion_segundos': segundos,
+            'tecnocorp_sql_consultas': medicion.consultas,
+            'tecnocorp_sql_segundos': medicion.segundos_sql,
+            'tecnocorp_plantillas_segundos': medicion.segundos_plantillas,
+        })
+        return response
+
+
+class PlantillaMedida:
+    def __init__(self, plantilla):
+        self.plantilla = plantilla
+
+    def __getattr__(self, nombre):
+        return getattr(self.plantilla, nombre)
+
+    def render(self, context=None, request=None):
+        inicio = time.perf_counter()
+        try:
+            return self.plantilla.render(context, request)
+        finally:
+            medicion = medicion_actual.get()
+            if medicion is not None:
+                medicion.segundos_plantillas += time.perf_counter() - inicio
+
+
+class PlantillasMedidas(DjangoTemplates):
+    def from_string(self, template_code):
+        return PlantillaMedida(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return PlantillaMedida(super().get_template(template_name))
@@ -0,0 +1,112 @@
+from django.conf import settings
+from django.http import FileResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence, compress_string
+
+from .archivos import ACEPTA_BROTLI, ACEPTA_GZIP
+from .routers import hay_replica, hubo_escritura, replica_permitida
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COOKIE_PRIMARIA = 'primaria'
+
+METODOS_LECTURA = ('GET', 'HEAD', 'OPTIONS')
+
+TIPOS_YA_COMPRIMIDOS = ('application/gzip', 'application/zip', 'image/jpeg', 'image/png', 'image/webp', 'image/avif', 'font/woff')
+
+CALIDAD_BROTLI = 5
+BYTES_ALEATORIOS_GZIP = 100
+
+
+class MiddlewareReplica:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not hay_replica():
+            return self.get_response(request)
+        lectura = request.method in METODOS_LECTURA and COOKIE_PRIMARIA not in request.COOKIES
+        ficha_replica = replica_permitida.set(lectura)
+        ficha_escritura = hubo_escritura.set(False)
+        try:
+            response = self.get_response(request)
+            if hubo_escritura.get() or request.method not in METODOS_LECTURA:
+                response.set_cookie(
+                    COOKIE_PRIMARIA,
+                    '1',
+                    max_age=settings.SEGUNDOS_PRIMARIA_TRAS_ESCRITURA,
+                    httponly=True,
+                    samesite='Lax',
+                )
+        finally:
+            replica_permitida.reset(ficha_replica)
+            hubo_escritura.reset(ficha_escritura)
+        return response
+
+
+def lleva_token_csrf(request, response):
+    # get_token() hace que CsrfViewMiddleware renueve la cookie; ocurre en toda página con {% csrf_token %}.
+    return settings.CSRF_COOKIE_NAME in response.cookies or request.META.get('CSRF_COOKIE_NEEDS_UPDATE', False)
+
+
+def codificacion_aceptada(request, response):
+    aceptadas = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    # Brotli no lleva relleno aleatorio contra BREACH: las páginas con token CSRF se quedan en gzip.
+    brotli_seguro = not response.streaming and not lleva_token_csrf(request, response)
+    if brotli is not None and brotli_seguro and ACEPTA_BROTLI.search(aceptadas):
+        return 'br'
+    if ACEPTA_GZIP.search(aceptadas):
+        return 'gzip'
+    return None
+
+
+def comprimir(contenido, codificacion):
+    if codificacion == 'br':
+        return brotli.compress(contenido, quality=CALIDAD_BROTLI)
+    return compress_string(contenido, max_random_bytes=BYTES_ALEATORIOS_GZIP)
+
+
+class MiddlewareCompresion(MiddlewareMixin):
+    def process_response(self, request, response):
+        if response.status_code == 206 or response.has_header('Content-Encoding'):
+            return response
+        # Los rangos de bytes se refieren al archivo sin comprimir.
+        if isinstance(response, FileResponse) or response.has_header('Accept-Ranges'):
+            return response
+        if response.get('Content-Type', '').startswith(TIPOS_YA_COMPRIMIDOS):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESION_TAMAÑO_MINIMO:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codificacion = codificacion_aceptada(request, response)
+        if codificacion is None:
+            return response
+
+        if response.streaming:
+            contenido = response.streaming_content
+            if response.is_async:
+                async def comprimir_flujo():
+                    async for bloque in contenido:
+                        yield compress_string(bloque, max_random_bytes=BYTES_ALEATORIOS_GZIP)
+
+                response.streaming_content = comprimir_flujo()
+            else:
+                response.streaming_content = compress_sequence(contenido, max_random_bytes=BYTES_ALEATORIOS_GZIP)
+            del response.headers['Content-Length']
+        else:
+            comprimido = comprimir(response.content, codificacion)
+            if len(comprimido) >= len(response.content):
+                return response
+            response.content = comprimido
+            response.headers['Content-Length'] = str(len(comprimido))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = f'W/{etag}'
+        response.headers['Content-Encoding'] = codificacion
+        return response
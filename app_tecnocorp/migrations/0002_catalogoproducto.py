@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:52
+
+from django.db import migrations, models
+
+
+MODELOS_CATALOGO = {
+    'pc': 'PCArmada',
+    'teclado': 'Teclado',
+    'monitor': 'Monitor',
+    'mouse': 'Mouse',
+    'audifonos': 'Audifonos',
+}
+
+
+def poblar_catalogo(apps, schema_editor):
+    CatalogoProducto = apps.get_model('app_tecnocorp', 'CatalogoProducto')
+    entradas = []
+    for tipo, nombre_modelo in MODELOS_CATALOGO.items():
+        modelo = apps.get_model('app_tecnocorp', nombre_modelo)
+        for producto in modelo.objects.iterator():
+            entradas.append(CatalogoProducto(
+                tipo=tipo,
+                id_producto=producto.pk,
+                nombre=producto.nombre,
+                categoria=producto.categoria,
+                precio=producto.precio,
+                foto=producto.foto.name if producto.foto else '',
+                tamaño=getattr(producto, 'tamaño', ''),
+                color=getattr(producto, 'color', ''),
+            ))
+    CatalogoProducto.objects.bulk_create(entradas, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_tecnocorp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogoProducto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=20)),
+                ('id_producto', models.IntegerField()),
+                ('nombre', models.CharField(max_length=200)),
+                ('categoria', models.CharField(max_length=100)),
+                ('precio', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('foto', models.ImageField(blank=True, null=True, upload_to='productos/')),
+                ('tamaño', models.CharField(blank=True, max_length=50)),
+                ('color', models.CharField(blank=True, max_length=50)),
+            ],
+            options={
+                'verbose_name': 'Producto del catálogo',
+                'verbose_name_plural': 'Catálogo de productos',
+                'indexes': [models.Index(fields=['precio', 'id'], name='catalogo_precio_idx'), models.Index(fields=['categoria'], name='catalogo_categoria_idx')],
+                'constraints': [models.UniqueConstraint(fields=('tipo', 'id_producto'), name='catalogo_tipo_producto_unico')],
+            },
+        ),
+        migrations.RunPython(poblar_catalogo, migrations.RunPython.noop),
+    ]
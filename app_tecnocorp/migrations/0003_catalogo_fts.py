@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:53
+
+from django.db import migrations
+
+SENTENCIAS_FTS = [
+    """
+    CREATE VIRTUAL TABLE app_tecnocorp_catalogo_fts USING fts5(
+        nombre, categoria, color, "tamaño",
+        content='app_tecnocorp_catalogoproducto',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER app_tecnocorp_catalogo_fts_ai AFTER INSERT ON app_tecnocorp_catalogoproducto BEGIN
+        INSERT INTO app_tecnocorp_catalogo_fts(rowid, nombre, categoria, color, "tamaño")
+        VALUES (new.id, new.nombre, new.categoria, new.color, new."tamaño");
+    END
+    """,
+    """
+    CREATE TRIGGER app_tecnocorp_catalogo_fts_ad AFTER DELETE ON app_tecnocorp_catalogoproducto BEGIN
+        INSERT INTO app_tecnocorp_catalogo_fts(app_tecnocorp_catalogo_fts, rowid, nombre, categoria, color, "tamaño")
+        VALUES ('delete', old.id, old.nombre, old.categoria, old.color, old."tamaño");
+    END
+    """,
+    """
+    CREATE TRIGGER app_tecnocorp_catalogo_fts_au AFTER UPDATE ON app_tecnocorp_catalogoproducto BEGIN
+        INSERT INTO app_tecnocorp_catalogo_fts(app_tecnocorp_catalogo_fts, rowid, nombre, categoria, color, "tamaño")
+        VALUES ('delete', old.id, old.nombre, old.categoria, old.color, old."tamaño");
+        INSERT INTO app_tecnocorp_catalogo_fts(rowid, nombre, categoria, color, "tamaño")
+        VALUES (new.id, new.nombre, new.categoria, new.color, new."tamaño");
+    END
+    """,
+    "INSERT INTO app_tecnocorp_catalogo_fts(app_tecnocorp_catalogo_fts) VALUES ('rebuild')",
+]
+
+SENTENCIAS_REVERSA = [
+    'DROP TRIGGER IF EXISTS app_tecnocorp_catalogo_fts_au',
+    'DROP TRIGGER IF EXISTS app_tecnocorp_catalogo_fts_ad',
+    'DROP TRIGGER IF EXISTS app_tecnocorp_catalogo_fts_ai',
+    'DROP TABLE IF EXISTS app_tecnocorp_catalogo_fts',
+]
+
+
+def crear_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sentencia in SENTENCIAS_FTS:
+        schema_editor.execute(sentencia)
+
+
+def eliminar_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sentencia in SENTENCIAS_REVERSA:
+        schema_editor.execute(sentencia)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_tecnocorp', '0002_catalogoproducto'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_fts, eliminar_fts),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:56
+
+from django.db import migrations, models
+
+
+MODELOS_CONTADOS = {
+    'pc': 'PCArmada',
+    'teclado': 'Teclado',
+    'monitor': 'Monitor',
+    'mouse': 'Mouse',
+    'audifonos': 'Audifonos',
+    'proveedores': 'Proveedor',
+    'pedidos': 'Pedido',
+    'usuarios': 'Usuario',
+}
+
+
+def poblar_contadores(apps, schema_editor):
+    ContadorEntidad = apps.get_model('app_tecnocorp', 'ContadorEntidad')
+    ContadorEntidad.objects.bulk_create([
+        ContadorEntidad(entidad=entidad, total=apps.get_model('app_tecnocorp', nombre_modelo).objects.count())
+        for entidad, nombre_modelo in MODELOS_CONTADOS.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_tecnocorp', '0003_catalogo_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorEntidad',
+            fields=[
+                ('entidad', models.CharField(max_length=30, primary_key=True, serialize=False)),
+                ('total', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Contador de entidad',
+                'verbose_name_plural': 'Contadores de entidades',
+            },
+        ),
+        migrations.RunPython(poblar_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_tecnocorp', '0004_contadorentidad'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PedidoLinea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=20)),
+                ('id_producto', models.IntegerField()),
+                ('nombre', models.CharField(max_length=200)),
+                ('precio_unitario', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('cantidad', models.PositiveIntegerField(default=1)),
+                ('pedido', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lineas', to='app_tecnocorp.pedido')),
+            ],
+            options={
+                'verbose_name': 'Línea de pedido',
+                'verbose_name_plural': 'Líneas de pedido',
+                'indexes': [models.Index(fields=['tipo', 'id_producto'], name='pedidolinea_producto_idx')],
+            },
+        ),
+    ]
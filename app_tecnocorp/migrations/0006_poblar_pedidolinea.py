@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:57
+
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations
+
+PATRON_PRODUCTOS = re.compile(r'Productos: (?P<productos>.*)\.\s*$', re.DOTALL)
+PATRON_LINEA = re.compile(r'(?P<nombre>.+?) x (?P<cantidad>\d+) \(\$(?P<precio>[\d.]+)\)(?: \| |$)', re.DOTALL)
+
+
+def lineas_de_pedido(PedidoLinea, pedido):
+    coincidencia = PATRON_PRODUCTOS.search(pedido.detalles)
+    claves = [clave for clave in pedido.id_producto.split(',') if clave]
+    if not coincidencia or not claves:
+        return []
+    encontradas = list(PATRON_LINEA.finditer(coincidencia.group('productos')))
+    if len(encontradas) != len(claves):
+        return []
+    lineas = []
+    for clave, linea in zip(claves, encontradas):
+        tipo, _, pk = clave.rpartition('-')
+        if not tipo or not pk.isdigit():
+            return []
+        try:
+            precio = Decimal(linea.group('precio'))
+        except InvalidOperation:
+            return []
+        lineas.append(PedidoLinea(
+            pedido=pedido,
+            tipo=tipo,
+            id_producto=int(pk),
+            nombre=linea.group('nombre')[:200],
+            precio_unitario=precio,
+            cantidad=int(linea.group('cantidad')),
+        ))
+    return lineas
+
+
+def poblar_lineas(apps, schema_editor):
+    Pedido = apps.get_model('app_tecnocorp', 'Pedido')
+    PedidoLinea = apps.get_model('app_tecnocorp', 'PedidoLinea')
+    lote = []
+    for pedido in Pedido.objects.filter(lineas__isnull=True).iterator(chunk_size=500):
+        lote.extend(lineas_de_pedido(PedidoLinea, pedido))
+        if len(lote) >= 500:
+            PedidoLinea.objects.bulk_create(lote)
+            lote = []
+    if lote:
+        PedidoLinea.objects.bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_tecnocorp', '0005_pedidolinea'),
+    ]
+
+    operations = [
+        migrations.RunPython(poblar_lineas, migrations.RunPython.noop),
+    ]
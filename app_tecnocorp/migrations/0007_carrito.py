@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_tecnocorp', '0006_poblar_pedidolinea'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Carrito',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creado', models.DateTimeField(default=django.utils.timezone.now)),
+                ('usuario', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='carrito', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Carrito',
+                'verbose_name_plural': 'Carritos',
+            },
+        ),
+        migrations.CreateModel(
+            name='LineaCarrito',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=20)),
+                ('id_producto', models.IntegerField()),
+                ('nombre', models.CharField(max_length=200)),
+                ('precio', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('categoria', models.CharField(blank=True, max_length=100)),
+                ('imagen', models.CharField(blank=True, max_length=255)),
+                ('cantidad', models.PositiveIntegerField(default=1)),
+                ('carrito', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lineas', to='app_tecnocorp.carrito')),
+            ],
+            options={
+                'verbose_name': 'Línea de carrito',
+                'verbose_name_plural': 'Líneas de carrito',
+                'constraints': [models.UniqueConstraint(fields=('carrito', 'tipo', 'id_producto'), name='linea_carrito_producto_unico')],
+            },
+        ),
+    ]
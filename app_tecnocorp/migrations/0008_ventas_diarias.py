@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_tecnocorp', '0007_carrito'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('estado', models.CharField(choices=[('Procesando', 'Procesando'), ('En camino', 'En camino'), ('Entregado', 'Entregado'), ('Cancelado', 'Cancelado')], max_length=50)),
+                ('pedidos', models.IntegerField(default=0)),
+                ('ingresos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'Venta diaria',
+                'verbose_name_plural': 'Ventas diarias',
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'estado'), name='venta_diaria_unica')],
+            },
+        ),
+        migrations.CreateModel(
+            name='VentaDiariaTipo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('estado', models.CharField(choices=[('Procesando', 'Procesando'), ('En camino', 'En camino'), ('Entregado', 'Entregado'), ('Cancelado', 'Cancelado')], max_length=50)),
+                ('tipo', models.CharField(max_length=20)),
+                ('unidades', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Venta diaria por tipo',
+                'verbose_name_plural': 'Ventas diarias por tipo',
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'estado', 'tipo'), name='venta_diaria_tipo_unica')],
+            },
+        ),
+    ]
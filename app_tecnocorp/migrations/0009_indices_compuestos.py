@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_tecnocorp', '0008_ventas_diarias'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='audifonos',
+            index=models.Index(fields=['precio', 'id_audifonos'], name='audifonos_precio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='audifonos',
+            index=models.Index(fields=['categoria', 'precio'], name='audifonos_categoria_precio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='monitor',
+            index=models.Index(fields=['precio', 'id_monitor'], name='monitor_precio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='monitor',
+            index=models.Index(fields=['categoria', 'precio'], name='monitor_categoria_precio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mouse',
+            index=models.Index(fields=['precio', 'id_mouse'], name='mouse_precio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mouse',
+            index=models.Index(fields=['categoria', 'precio'], name='mouse_categoria_precio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pcarmada',
+            index=models.Index(fields=['precio', 'id_pc'], name='pcarmada_precio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pcarmada',
+            index=models.Index(fields=['categoria', 'precio'], name='pcarmada_categoria_precio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['usuario', 'fecha_pedido', 'id_pedido'], name='pedido_usuario_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['estado', 'fecha_pedido', 'id_pedido'], name='pedido_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['fecha_pedido', 'id_pedido'], name='pedido_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teclado',
+            index=models.Index(fields=['precio', 'id_teclado'], name='teclado_precio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teclado',
+            index=models.Index(fields=['categoria', 'precio'], name='teclado_categoria_precio_idx'),
+        ),
+    ]
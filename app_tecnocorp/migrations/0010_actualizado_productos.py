@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:10
+
+from importlib import import_module
+
+import django.utils.timezone
+from django.db import migrations, models
+
+catalogo_fts = import_module('app_tecnocorp.migrations.0003_catalogo_fts')
+
+
+def recrear_triggers_fts(apps, schema_editor):
+    # Añadir la columna reconstruye la tabla del catálogo en SQLite y se pierden sus triggers FTS.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sentencia in catalogo_fts.SENTENCIAS_REVERSA[:3]:
+        schema_editor.execute(sentencia)
+    for sentencia in catalogo_fts.SENTENCIAS_FTS[1:]:
+        schema_editor.execute(sentencia)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_tecnocorp', '0009_indices_compuestos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audifonos',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='catalogoproducto',
+            name='actualizado',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(recrear_triggers_fts, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='monitor',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='mouse',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='pcarmada',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='teclado',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_tecnocorp', '0010_actualizado_productos'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='audifonos',
+            index=models.Index(fields=['actualizado'], name='audifonos_actualizado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='monitor',
+            index=models.Index(fields=['actualizado'], name='monitor_actualizado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mouse',
+            index=models.Index(fields=['actualizado'], name='mouse_actualizado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pcarmada',
+            index=models.Index(fields=['actualizado'], name='pcarmada_actualizado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teclado',
+            index=models.Index(fields=['actualizado'], name='teclado_actualizado_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_tecnocorp', '0011_indices_actualizado'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='audifonos',
+            index=models.Index(fields=['color', 'precio'], name='audifonos_color_precio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='catalogoproducto',
+            index=models.Index(fields=['tipo', 'categoria', 'tamaño', 'color', 'precio'], name='catalogo_facetas_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='monitor',
+            index=models.Index(fields=['tamaño', 'precio'], name='monitor_tamano_precio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mouse',
+            index=models.Index(fields=['color', 'precio'], name='mouse_color_precio_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:25
+
+from django.db import migrations
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def poblar_ventas(apps, schema_editor):
+    Pedido = apps.get_model('app_tecnocorp', 'Pedido')
+    PedidoLinea = apps.get_model('app_tecnocorp', 'PedidoLinea')
+    VentaDiaria = apps.get_model('app_tecnocorp', 'VentaDiaria')
+    VentaDiariaTipo = apps.get_model('app_tecnocorp', 'VentaDiariaTipo')
+    # Lo que ya hubiera acumulado el checkout se rehace desde el historial completo de pedidos.
+    VentaDiariaTipo.objects.all().delete()
+    VentaDiaria.objects.all().delete()
+    ventas = (
+        Pedido.objects.annotate(fecha=TruncDate('fecha_pedido'))
+        .values('fecha', 'estado')
+        .annotate(pedidos=Count('id_pedido'), ingresos=Sum('precio'))
+        .order_by()
+    )
+    VentaDiaria.objects.bulk_create([VentaDiaria(**venta) for venta in ventas.iterator()], batch_size=500)
+    unidades = (
+        PedidoLinea.objects.annotate(fecha=TruncDate('pedido__fecha_pedido'))
+        .values('fecha', 'tipo', estado=F('pedido__estado'))
+        .annotate(unidades=Sum('cantidad'))
+        .order_by()
+    )
+    VentaDiariaTipo.objects.bulk_create([VentaDiariaTipo(**fila) for fila in unidades.iterator()], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_tecnocorp', '0012_indices_facetas'),
+    ]
+
+    operations = [
+        migrations.RunPython(poblar_ventas, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,16 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.utils import timezone
 
 
+class GuardadoAtomico:
+    # Los receptores de post_save (contadores, catálogo) corren en la misma transacción que la escritura.
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
+
 class GestorUsuario(BaseUserManager):
     def create_user(self, usuario, nombre, correo, password=None, **extra):
         if not usuario:
@@ -38,7 +46,7 @@ class GestorUsuario(BaseUserManager):
         return self.create_superuser(usuario, nombre, correo, contraseña, **extra)
 
 
-class Usuario(AbstractBaseUser, PermissionsMixin):
+class Usuario(GuardadoAtomico, AbstractBaseUser, PermissionsMixin):
     id_usuario = models.AutoField(primary_key=True)
     nombre = models.CharField(max_length=150)
     usuario = models.CharField(max_length=150, unique=True)
@@ -70,85 +78,118 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
         return all([self.calle, self.colonia, self.ciudad, self.numero_casa])
 
 
-class PCArmada(models.Model):
+class PCArmada(GuardadoAtomico, models.Model):
     id_pc = models.AutoField(primary_key=True)
     foto = models.ImageField(upload_to='productos/pc/', blank=True, null=True)
     nombre = models.CharField(max_length=200)
     precio = models.DecimalField(max_digits=10, decimal_places=2)
     categoria = models.CharField(max_length=100)
+    actualizado = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'PC Armado'
         verbose_name_plural = 'PC Armadas'
+        indexes = [
+            models.Index(fields=['precio', 'id_pc'], name='pcarmada_precio_idx'),
+            models.Index(fields=['categoria', 'precio'], name='pcarmada_categoria_precio_idx'),
+            models.Index(fields=['actualizado'], name='pcarmada_actualizado_idx'),
+        ]
 
     def __str__(self):
         return self.nombre
 
 
-class Teclado(models.Model):
+class Teclado(GuardadoAtomico, models.Model):
     id_teclado = models.AutoField(primary_key=True)
     foto = models.ImageField(upload_to='productos/teclados/', blank=True, null=True)
     nombre = models.CharField(max_length=200)
     precio = models.DecimalField(max_digits=10, decimal_places=2)
     categoria = models.CharField(max_length=100)
+    actualizado = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'Teclado'
         verbose_name_plural = 'Teclados'
+        indexes = [
+            models.Index(fields=['precio', 'id_teclado'], name='teclado_precio_idx'),
+            models.Index(fields=['categoria', 'precio'], name='teclado_categoria_precio_idx'),
+            models.Index(fields=['actualizado'], name='teclado_actualizado_idx'),
+        ]
 
     def __str__(self):
         return self.nombre
 
 
-class Monitor(models.Model):
+class Monitor(GuardadoAtomico, models.Model):
     id_monitor = models.AutoField(primary_key=True)
     foto = models.ImageField(upload_to='productos/monitores/', blank=True, null=True)
     nombre = models.CharField(max_length=200)
     tamaño = models.CharField(max_length=50)
     precio = models.DecimalField(max_digits=10, decimal_places=2)
     categoria = models.CharField(max_length=100)
+    actualizado = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'Monitor'
         verbose_name_plural = 'Monitores'
+        indexes = [
+            models.Index(fields=['precio', 'id_monitor'], name='monitor_precio_idx'),
+            models.Index(fields=['categoria', 'precio'], name='monitor_categoria_precio_idx'),
+            models.Index(fields=['tamaño', 'precio'], name='monitor_tamano_precio_idx'),
+            models.Index(fields=['actualizado'], name='monitor_actualizado_idx'),
+        ]
 
     def __str__(self):
         return self.nombre
 
 
-class Mouse(models.Model):
+class Mouse(GuardadoAtomico, models.Model):
     id_mouse = models.AutoField(primary_key=True)
     foto = models.ImageField(upload_to='productos/mouse/', blank=True, null=True)
     nombre = models.CharField(max_length=200)
     precio = models.DecimalField(max_digits=10, decimal_places=2)
     categoria = models.CharField(max_length=100)
     color = models.CharField(max_length=50)
+    actualizado = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'Mouse'
         verbose_name_plural = 'Mouses'
+        indexes = [
+            models.Index(fields=['precio', 'id_mouse'], name='mouse_precio_idx'),
+            models.Index(fields=['categoria', 'precio'], name='mouse_categoria_precio_idx'),
+            models.Index(fields=['color', 'precio'], name='mouse_color_precio_idx'),
+            models.Index(fields=['actualizado'], name='mouse_actualizado_idx'),
+        ]
 
     def __str__(self):
         return self.nombre
 
 
-class Audifonos(models.Model):
+class Audifonos(GuardadoAtomico, models.Model):
     id_audifonos = models.AutoField(primary_key=True)
     foto = models.ImageField(upload_to='productos/audifonos/', blank=True, null=True)
     nombre = models.CharField(max_length=200)
     color = models.CharField(max_length=50)
     precio = models.DecimalField(max_digits=10, decimal_places=2)
     categoria = models.CharField(max_length=100)
+    actualizado = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'Audífono'
         verbose_name_plural = 'Audífonos'
+        indexes = [
+            models.Index(fields=['precio', 'id_audifonos'], name='audifonos_precio_idx'),
+            models.Index(fields=['categoria', 'precio'], name='audifonos_categoria_precio_idx'),
+            models.Index(fields=['color', 'precio'], name='audifonos_color_precio_idx'),
+            models.Index(fields=['actualizado'], name='audifonos_actualizado_idx'),
+        ]
 
     def __str__(self):
         return self.nombre
 
 
-class Proveedor(models.Model):
+class Proveedor(GuardadoAtomico, models.Model):
     id_proveedor = models.AutoField(primary_key=True)
     id_producto = models.CharField(max_length=120)
     nombre = models.CharField(max_length=200)
@@ -162,7 +203,7 @@ class Proveedor(models.Model):
         return f'{self.nombre} - {self.id_producto}'
 
 
-class Pedido(models.Model):
+class Pedido(GuardadoAtomico, models.Model):
     ESTADOS = [
         ('Procesando', 'Procesando'),
         ('En camino', 'En camino'),
@@ -182,6 +223,150 @@ class Pedido(models.Model):
     class Meta:
         verbose_name = 'Pedido'
         verbose_name_plural = 'Pedidos'
+        indexes = [
+            models.Index(fields=['usuario', 'fecha_pedido', 'id_pedido'], name='pedido_usuario_fecha_idx'),
+            models.Index(fields=['estado', 'fecha_pedido', 'id_pedido'], name='pedido_estado_fecha_idx'),
+            models.Index(fields=['fecha_pedido', 'id_pedido'], name='pedido_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f'Pedido #{self.id_pedido} - {self.usuario.usuario}'
+
+
+class PedidoLinea(models.Model):
+    pedido = models.ForeignKey(Pedido, on_delete=models.CASCADE, related_name='lineas')
+    tipo = models.CharField(max_length=20)
+    id_producto = models.IntegerField()
+    nombre = models.CharField(max_length=200)
+    precio_unitario = models.DecimalField(max_digits=10, decimal_places=2)
+    cantidad = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        verbose_name = 'Línea de pedido'
+        verbose_name_plural = 'Líneas de pedido'
+        indexes = [
+            models.Index(fields=['tipo', 'id_producto'], name='pedidolinea_producto_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.nombre} x {self.cantidad}'
+
+    @property
+    def subtotal(self):
+        return self.precio_unitario * self.cantidad
+
+
+class VentaDiaria(models.Model):
+    fecha = models.DateField()
+    estado = models.CharField(max_length=50, choices=Pedido.ESTADOS)
+    pedidos = models.IntegerField(default=0)
+    ingresos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = 'Venta diaria'
+        verbose_name_plural = 'Ventas diarias'
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'estado'], name='venta_diaria_unica'),
+        ]
+
+    def __str__(self):
+        return f'{self.fecha} {self.estado}: {self.pedidos}'
+
+
+class VentaDiariaTipo(models.Model):
+    fecha = models.DateField()
+    estado = models.CharField(max_length=50, choices=Pedido.ESTADOS)
+    tipo = models.CharField(max_length=20)
+    unidades = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Venta diaria por tipo'
+        verbose_name_plural = 'Ventas diarias por tipo'
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'estado', 'tipo'], name='venta_diaria_tipo_unica'),
+        ]
+
+    def __str__(self):
+        return f'{self.fecha} {self.estado} {self.tipo}: {self.unidades}'
+
+
+class Carrito(models.Model):
+    usuario = models.OneToOneField(
+        Usuario, on_delete=models.CASCADE, related_name='carrito', blank=True, null=True
+    )
+    creado = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Carrito'
+        verbose_name_plural = 'Carritos'
+
+    def __str__(self):
+        return f'Carrito #{self.pk}'
+
+
+class LineaCarrito(models.Model):
+    carrito = models.ForeignKey(Carrito, on_delete=models.CASCADE, related_name='lineas')
+    tipo = models.CharField(max_length=20)
+    id_producto = models.IntegerField()
+    nombre = models.CharField(max_length=200)
+    precio = models.DecimalField(max_digits=10, decimal_places=2)
+    categoria = models.CharField(max_length=100, blank=True)
+    imagen = models.CharField(max_length=255, blank=True)
+    cantidad = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        verbose_name = 'Línea de carrito'
+        verbose_name_plural = 'Líneas de carrito'
+        constraints = [
+            models.UniqueConstraint(fields=['carrito', 'tipo', 'id_producto'], name='linea_carrito_producto_unico'),
+        ]
+
+    def __str__(self):
+        return f'{self.nombre} x {self.cantidad}'
+
+    @property
+    def clave(self):
+        return f'{self.tipo}-{self.id_producto}'
+
+    @property
+    def subtotal(self):
+        return self.precio * self.cantidad
+
+
+class CatalogoProducto(models.Model):
+    tipo = models.CharField(max_length=20)
+    id_producto = models.IntegerField()
+    nombre = models.CharField(max_length=200)
+    categoria = models.CharField(max_length=100)
+    precio = models.DecimalField(max_digits=10, decimal_places=2)
+    foto = models.ImageField(upload_to='productos/', blank=True, null=True)
+    tamaño = models.CharField(max_length=50, blank=True)
+    color = models.CharField(max_length=50, blank=True)
+    actualizado = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Producto del catálogo'
+        verbose_name_plural = 'Catálogo de productos'
+        constraints = [
+            models.UniqueConstraint(fields=['tipo', 'id_producto'], name='catalogo_tipo_producto_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['precio', 'id'], name='catalogo_precio_idx'),
+            models.Index(fields=['categoria'], name='catalogo_categoria_idx'),
+            models.Index(fields=['tipo', 'categoria', 'tamaño', 'color', 'precio'], name='catalogo_facetas_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.nombre} ({self.tipo})'
+
+
+class ContadorEntidad(models.Model):
+    entidad = models.CharField(max_length=30, primary_key=True)
+    total = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Contador de entidad'
+        verbose_name_plural = 'Contadores de entidades'
 
     def __str__(self):
-        return f'Pedido #{self.id_pedido} - {self.usuario.usuario}'
\ No newline at end of file
+        return f'{self.entidad}: {self.total}'
@@ -0,0 +1,169 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+POR_PAGINA = 24
+
+SIGUIENTE = 's'
+ANTERIOR = 'a'
+
+
+def codificar_cursor(direccion, valores):
+    datos = json.dumps({'d': direccion, 'v': [str(valor) for valor in valores]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        direccion, valores = datos['d'], datos['v']
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        return None, None
+    if direccion not in (SIGUIENTE, ANTERIOR) or not isinstance(valores, list):
+        return None, None
+    if not all(isinstance(valor, str) for valor in valores):
+        return None, None
+    return direccion, valores
+
+
+class PaginaKeyset:
+    def __init__(self, objetos, cursor_siguiente=None, cursor_anterior=None):
+        self.objetos = objetos
+        self.cursor_siguiente = cursor_siguiente
+        self.cursor_anterior = cursor_anterior
+        self.url_siguiente = ''
+        self.url_anterior = ''
+
+    def __iter__(self):
+        return iter(self.objetos)
+
+    def __len__(self):
+        return len(self.objetos)
+
+    @property
+    def tiene_siguiente(self):
+        return self.cursor_siguiente is not None
+
+    @property
+    def tiene_anterior(self):
+        return self.cursor_anterior is not None
+
+    @property
+    def tiene_otras_paginas(self):
+        return self.tiene_siguiente or self.tiene_anterior
+
+
+class PaginadorKeyset:
+    def __init__(self, queryset, orden, por_pagina=POR_PAGINA):
+        self.queryset = queryset
+        self.por_pagina = por_pagina
+        self.orden = []
+        for nombre in orden:
+            descendente = nombre.startswith('-')
+            campo = nombre.lstrip('-')
+            if campo == 'pk':
+                campo = queryset.model._meta.pk.name
+            self.orden.append((campo, descendente))
+
+    def campo_modelo(self, campo):
+        try:
+            return self.queryset.model._meta.get_field(campo)
+        except FieldDoesNotExist:
+            return None
+
+    def convertir_valores(self, valores):
+        if len(valores) != len(self.orden):
+            return None
+        convertidos = []
+        for (campo, _), valor in zip(self.orden, valores):
+            campo_modelo = self.campo_modelo(campo)
+            try:
+                if campo_modelo:
+                    valor = campo_modelo.to_python(valor)
+                    campo_modelo.run_validators(valor)
+                convertidos.append(valor)
+            except ValidationError:
+                return None
+        return convertidos
+
+    def filtro_posterior(self, valores, invertir=False):
+        condicion = Q()
+        for posicion, (campo, descendente) in enumerate(self.orden):
+            operador = 'lt' if descendente != invertir else 'gt'
+            filtro = {campo: valores[indice] for indice, (campo, _) in enumerate(self.orden[:posicion])}
+            filtro[f'{campo}__{operador}'] = valores[posicion]
+            condicion |= Q(**filtro)
+        primer_campo, descendente = self.orden[0]
+        operador = 'lte' if descendente != invertir else 'gte'
+        return Q(**{f'{primer_campo}__{operador}': valores[0]}) & condicion
+
+    def orden_consulta(self, invertir=False):
+        return [campo if descendente == invertir else f'-{campo}' for campo, descendente in self.orden]
+
+    def valores_de(self, objeto):
+        return [getattr(objeto, campo) for campo, _ in self.orden]
+
+    def consulta(self, cursor=None):
+        direccion, valores = decodificar_cursor(cursor) if cursor else (None, None)
+        if valores is not None:
+            valores = self.convertir_valores(valores)
+        if valores is None:
+            direccion = None
+
+        invertir = direccion == ANTERIOR
+        queryset = self.queryset.order_by(*self.orden_consulta(invertir))
+        if direccion:
+            queryset = queryset.filter(self.filtro_posterior(valores, invertir))
+        return queryset[:self.por_pagina + 1], direccion
+
+    def construir_pagina(self, objetos, direccion):
+        invertir = direccion == ANTERIOR
+        hay_mas = len(objetos) > self.por_pagina
+        objetos = objetos[:self.por_pagina]
+        if invertir:
+            objetos.reverse()
+
+        cursor_siguiente = None
+        cursor_anterior = None
+        if objetos:
+            if hay_mas or invertir:
+                cursor_siguiente = codificar_cursor(SIGUIENTE, self.valores_de(objetos[-1]))
+            if direccion == SIGUIENTE or (invertir and hay_mas):
+                cursor_anterior = codificar_cursor(ANTERIOR, self.valores_de(objetos[0]))
+        return PaginaKeyset(objetos, cursor_siguiente, cursor_anterior)
+
+    def pagina(self, cursor=None):
+        queryset, direccion = self.consulta(cursor)
+        return self.construir_pagina(list(queryset), direccion)
+
+    async def apagina(self, cursor=None):
+        queryset, direccion = self.consulta(cursor)
+        return self.construir_pagina([objeto async for objeto in queryset.aiterator()], direccion)
+
+
+def url_con_cursor(request, cursor):
+    parametros = request.GET.copy()
+    parametros['cursor'] = cursor
+    return f'?{parametros.urlencode()}'
+
+
+def enlazar_pagina(request, pagina):
+    if pagina.tiene_siguiente:
+        pagina.url_siguiente = url_con_cursor(request, pagina.cursor_siguiente)
+    if pagina.tiene_anterior:
+        pagina.url_anterior = url_con_cursor(request, pagina.cursor_anterior)
+    return pagina
+
+
+def paginar(request, queryset, orden, por_pagina=POR_PAGINA):
+    pagina = PaginadorKeyset(queryset, orden, por_pagina).pagina(request.GET.get('cursor'))
+    return enlazar_pagina(request, pagina)
+
+
+async def apaginar(request, queryset, orden, por_pagina=POR_PAGINA):
+    pagina = await PaginadorKeyset(queryset, orden, por_pagina).apagina(request.GET.get('cursor'))
+    return enlazar_pagina(request, pagina)
@@ -0,0 +1,43 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+
+ALIAS_REPLICA = 'replica'
+
+MODELOS_REPLICADOS = {
+    'pcarmada',
+    'teclado',
+    'monitor',
+    'mouse',
+    'audifonos',
+    'catalogoproducto',
+}
+
+replica_permitida = ContextVar('replica_permitida', default=False)
+hubo_escritura = ContextVar('hubo_escritura', default=False)
+
+
+def hay_replica():
+    return ALIAS_REPLICA in settings.DATABASES
+
+
+class RouterReplica:
+    def db_for_read(self, model, **hints):
+        if not replica_permitida.get() or not hay_replica():
+            return None
+        if model._meta.app_label == 'app_tecnocorp' and model._meta.model_name in MODELOS_REPLICADOS:
+            return ALIAS_REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        hubo_escritura.set(True)
+        replica_permitida.set(False)
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == ALIAS_REPLICA:
+            return False
+        return None
@@ -0,0 +1,76 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+from .catalogo import (
+    MODELOS_CATALOGO,
+    TIPOS_POR_MODELO,
+    eliminar_del_catalogo,
+    foto_en_uso,
+    invalidar_catalogo,
+    sincronizar_productos,
+)
+from .contadores import ENTIDADES_POR_MODELO, actualizar_contador
+from .imagenes import programar_eliminacion_derivados
+from .models import Pedido, PedidoLinea
+from .ventas import mover_pedido, registrar_lineas, venta_de, venta_guardada
+
+
+def producto_guardado(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    tipo = TIPOS_POR_MODELO[sender]
+    sincronizar_productos(tipo, [instance])
+    transaction.on_commit(partial(invalidar_catalogo, tipo))
+
+
+def producto_eliminado(sender, instance, **kwargs):
+    tipo = TIPOS_POR_MODELO[sender]
+    eliminar_del_catalogo(tipo, instance.pk)
+    transaction.on_commit(partial(invalidar_catalogo, tipo))
+    if instance.foto and not foto_en_uso(instance.foto.name):
+        transaction.on_commit(partial(programar_eliminacion_derivados, instance.foto.name))
+
+
+def entidad_creada(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        actualizar_contador(ENTIDADES_POR_MODELO[sender], 1)
+
+
+def entidad_eliminada(sender, instance, **kwargs):
+    actualizar_contador(ENTIDADES_POR_MODELO[sender], -1)
+
+
+def pedido_por_guardar(sender, instance, using=None, **kwargs):
+    instance._venta_guardada = None if instance.pk is None else venta_guardada(instance.pk, using)
+
+
+def pedido_guardado(sender, instance, created=False, **kwargs):
+    # Cualquier alta o cambio (vistas, admin, shell) mueve los acumulados una sola vez.
+    anterior = instance.__dict__.pop('_venta_guardada', None)
+    mover_pedido(instance, anterior, venta_de(instance), unidades={} if created else None)
+
+
+def pedido_eliminado(sender, instance, using=None, **kwargs):
+    # Antes de borrar: las líneas del pedido se eliminan en cascada antes que el propio pedido.
+    # Se resta lo guardado en la base, no lo que tenga la instancia en memoria.
+    mover_pedido(instance, venta_guardada(instance.pk, using), None)
+
+
+def linea_creada(sender, instance, created=False, **kwargs):
+    if created:
+        registrar_lineas(instance.pedido, [instance])
+
+
+def conectar_senales():
+    for tipo, modelo in MODELOS_CATALOGO.items():
+        post_save.connect(producto_guardado, sender=modelo, dispatch_uid=f'catalogo_guardado_{tipo}')
+        post_delete.connect(producto_eliminado, sender=modelo, dispatch_uid=f'catalogo_eliminado_{tipo}')
+    for modelo, entidad in ENTIDADES_POR_MODELO.items():
+        post_save.connect(entidad_creada, sender=modelo, dispatch_uid=f'contador_creado_{entidad}')
+        post_delete.connect(entidad_eliminada, sender=modelo, dispatch_uid=f'contador_eliminado_{entidad}')
+    pre_save.connect(pedido_por_guardar, sender=Pedido, dispatch_uid='ventas_pedido_por_guardar')
+    post_save.connect(pedido_guardado, sender=Pedido, dispatch_uid='ventas_pedido_guardado')
+    pre_delete.connect(pedido_eliminado, sender=Pedido, dispatch_uid='ventas_pedido_eliminado')
+    post_save.connect(linea_creada, sender=PedidoLinea, dispatch_uid='ventas_linea_creada')
@@ -0,0 +1,39 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+
+from app_tecnocorp.imagenes import ancho_original, derivados_existentes, nombre_derivado
+
+register = template.Library()
+
+
+def srcset(foto, anchos, extension):
+    candidatos = [
+        f'{default_storage.url(nombre_derivado(foto.name, ancho, extension))} {ancho}w'
+        for ancho in anchos
+    ]
+    # El original cierra la lista: las pantallas más anchas que el mayor derivado no reciben una ampliación.
+    original = ancho_original(foto.name)
+    if original > anchos[-1]:
+        candidatos.append(f'{foto.url} {original}w')
+    return ', '.join(candidatos)
+
+
+@register.simple_tag
+def imagen_responsiva(foto, alt, tamaños, estilo=''):
+    anchos = derivados_existentes(foto.name)
+    if not anchos:
+        return format_html('<img src="{}" alt="{}" loading="lazy" style="{}">', foto.url, alt, estilo)
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" loading="lazy" style="{}">'
+        '</picture>',
+        srcset(foto, anchos, 'webp'),
+        tamaños,
+        foto.url,
+        srcset(foto, anchos, 'jpg'),
+        tamaños,
+        alt,
+        estilo,
+    )
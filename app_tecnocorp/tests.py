@@ -1,3 +1,1100 @@
-from django.test import TestCase
+import csv
+import gzip
+import re
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.http import FileResponse, HttpResponse
+from django.template import Context, Template
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import urlencode
+from PIL import Image
+
+from .models import (
+    Carrito,
+    CatalogoProducto,
+    LineaCarrito,
+    Usuario,
+    PCArmada,
+    Teclado,
+    Monitor,
+    Mouse,
+    Audifonos,
+    Proveedor,
+    Pedido,
+    PedidoLinea,
+    VentaDiaria,
+    VentaDiariaTipo,
+)
+from .archivos import CACHE_INMUTABLE, CACHE_REVALIDAR
+from .cache_paginas import MARCADOR_CSRF
+from .carrito import sumar_linea
+from .catalogo import buscar_en_catalogo, invalidar_tarjeta
+from .contadores import obtener_totales, recalcular_contadores
+from .exportacion import COLUMNAS_PEDIDOS
+from .imagenes import ancho_original, derivados_existentes, eliminar_derivados, generar_derivados, nombre_derivado
+from .metricas import HISTOGRAMAS, registro
+from .middleware import COOKIE_PRIMARIA, MiddlewareCompresion, MiddlewareReplica
+from .paginacion import ANTERIOR, SIGUIENTE, PaginadorKeyset, codificar_cursor
+from .routers import ALIAS_REPLICA, RouterReplica
+from .ventas import reconstruir_ventas, registrar_lineas
+from .views import TIPO_PROMETHEUS, escritura_inmediata, servir_estatico
+
+ESCANEO_COMPLETO = re.compile(r'\bSCAN (app_tecnocorp_\w+)(?!.*\b(?:INDEX|VIRTUAL TABLE)\b)')
+ORDEN_TEMPORAL = 'USE TEMP B-TREE FOR ORDER BY'
+RECORRIDO = re.compile(r'SCAN (?!\d+ CONSTANT ROWS)')
+
+
+def plan_de(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [fila[-1] for fila in cursor.fetchall()]
+
+
+def escaneos_completos(sql, plan):
+    # Recorrer la tabla en orden de rowid sin filtros y con LIMIT solo lee la página pedida.
+    recorrido_acotado = ' WHERE ' not in sql and ' LIMIT ' in sql and ORDEN_TEMPORAL not in plan
+    return [paso for paso in plan if ESCANEO_COMPLETO.search(paso) and not recorrido_acotado]
+
+
+class PlanesDeConsultaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_superuser('admin', 'Admin', 'admin@tecnocorp.mx', 'clave-segura')
+        cls.cliente = Usuario.objects.create_user(
+            'cliente', 'Cliente', 'cliente@tecnocorp.mx', 'clave-segura',
+            ciudad='CDMX', calle='Reforma', colonia='Centro', numero_casa='10',
+        )
+        for indice in range(6):
+            precio = Decimal(100 + indice * 50)
+            categoria = 'Gamer' if indice % 2 else 'Oficina'
+            PCArmada.objects.create(nombre=f'PC {indice}', precio=precio, categoria=categoria)
+            Teclado.objects.create(nombre=f'Teclado {indice}', precio=precio, categoria=categoria)
+            Monitor.objects.create(nombre=f'Monitor {indice}', precio=precio, categoria=categoria, tamaño='27"')
+            Mouse.objects.create(nombre=f'Mouse {indice}', precio=precio, categoria=categoria, color='Negro')
+            Audifonos.objects.create(nombre=f'Audífonos {indice}', precio=precio, categoria=categoria, color='Rojo')
+            Proveedor.objects.create(id_producto=f'teclado-{indice}', nombre=f'Proveedor {indice}', precio=precio)
+        ahora = timezone.now()
+        for indice in range(6):
+            pedido = Pedido.objects.create(
+                id_producto='teclado-1',
+                usuario=cls.cliente,
+                detalles='Teclado 1 x1',
+                precio=Decimal('150.00'),
+                fecha_pedido=ahora - timedelta(days=indice),
+                estado='Entregado' if indice % 2 else 'Procesando',
+            )
+            PedidoLinea.objects.create(
+                pedido=pedido, tipo='teclado', id_producto=1, nombre='Teclado 1',
+                precio_unitario=Decimal('150.00'), cantidad=1,
+            )
+
+    def consultas_de(self, url, usuario=None, datos=None):
+        if usuario is not None:
+            self.client.force_login(usuario)
+        cache.clear()
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as consultas:
+                if datos is None:
+                    respuesta = self.client.get(url)
+                else:
+                    respuesta = self.client.post(url, datos)
+                if respuesta.streaming:
+                    b''.join(respuesta.streaming_content)
+            transaction.set_rollback(True)
+        self.assertIn(respuesta.status_code, (200, 302), url)
+        return [
+            consulta['sql'] for consulta in consultas.captured_queries
+            if consulta['sql'].startswith(('SELECT', 'UPDATE'))
+        ]
+
+    def assertSinEscaneosCompletos(self, url, usuario=None):
+        consultas = self.consultas_de(url, usuario)
+        self.assertTrue(consultas, url)
+        for sql in consultas:
+            self.assertEqual(escaneos_completos(sql, plan_de(sql)), [], f'{url}\n{sql}')
+        return consultas
+
+    def assertSoloBusquedas(self, url, usuario, datos=None):
+        consultas = [sql for sql in self.consultas_de(url, usuario, datos) if '"app_tecnocorp_pedido"' in sql]
+        self.assertTrue(consultas, url)
+        for sql in consultas:
+            plan = plan_de(sql)
+            self.assertEqual([paso for paso in plan if RECORRIDO.match(paso)], [], f'{url} {datos}\n{sql}\n{plan}')
+
+    def assertOrdenPorIndice(self, url, tabla, usuario=None):
+        consultas = [sql for sql in self.consultas_de(url, usuario) if f'FROM "{tabla}"' in sql and 'ORDER BY' in sql]
+        self.assertTrue(consultas, url)
+        for sql in consultas:
+            self.assertNotIn(ORDEN_TEMPORAL, plan_de(sql), f'{url}\n{sql}')
+
+    def urls_paginadas(self, url, valores):
+        separador = '&' if '?' in url else '?'
+        return [
+            url,
+            f'{url}{separador}cursor={codificar_cursor(SIGUIENTE, valores)}',
+            f'{url}{separador}cursor={codificar_cursor(ANTERIOR, valores)}',
+        ]
+
+    def test_catalogo_publico(self):
+        self.assertSinEscaneosCompletos(reverse('index'))
+        busqueda = self.assertSinEscaneosCompletos(reverse('lista_productos') + '?busqueda=teclado')
+        self.assertTrue([sql for sql in busqueda if ' MATCH ' in sql])
+        for url in self.urls_paginadas(reverse('lista_productos'), ['200.00', 3]):
+            self.assertSinEscaneosCompletos(url)
+            self.assertOrdenPorIndice(url, 'app_tecnocorp_catalogoproducto')
+
+    def test_productos_por_tipo(self):
+        for tipo, tabla in [('pc', 'app_tecnocorp_pcarmada'), ('monitor', 'app_tecnocorp_monitor')]:
+            for url in self.urls_paginadas(reverse('productos_por_tipo', args=[tipo]), ['200.00', 3]):
+                self.assertSinEscaneosCompletos(url)
+                self.assertOrdenPorIndice(url, tabla)
+            self.assertSinEscaneosCompletos(reverse('detalle_producto', args=[tipo, 2]))
+
+    def test_facetas_por_tipo(self):
+        filtros = [
+            ('mouse', 'app_tecnocorp_mouse', '?color=Negro'),
+            ('mouse', 'app_tecnocorp_mouse', '?categoria=Gamer&orden=-precio'),
+            ('monitor', 'app_tecnocorp_monitor', '?tamaño=27"&precio_min=150'),
+            ('pc', 'app_tecnocorp_pcarmada', '?precio_min=150&precio_max=300&orden=-precio'),
+        ]
+        for tipo, tabla, filtro in filtros:
+            url = reverse('productos_por_tipo', args=[tipo]) + filtro
+            self.assertSinEscaneosCompletos(url)
+            self.assertOrdenPorIndice(url, tabla)
+            for pagina in self.urls_paginadas(url, ['200.00', 3]):
+                self.assertOrdenPorIndice(pagina, tabla)
+
+    def test_pedidos_del_cliente(self):
+        fecha = Pedido.objects.order_by('fecha_pedido').values_list('fecha_pedido', 'id_pedido')[2]
+        for nombre in ('perfil_usuario', 'pedidos_usuario'):
+            for url in self.urls_paginadas(reverse(nombre), list(fecha)):
+                self.assertSinEscaneosCompletos(url, self.cliente)
+                self.assertOrdenPorIndice(url, 'app_tecnocorp_pedido', self.cliente)
+
+    def test_panel_administrador(self):
+        self.assertSinEscaneosCompletos(reverse('panel_admin'), self.admin)
+        self.assertSinEscaneosCompletos(reverse('admin_lista_productos', args=['mouse']), self.admin)
+        self.assertSinEscaneosCompletos(reverse('admin_lista_proveedores'), self.admin)
+        self.assertSinEscaneosCompletos(reverse('admin_detalle_usuario', args=[self.cliente.pk]), self.admin)
+
+    def test_pedidos_del_administrador(self):
+        fecha = Pedido.objects.order_by('fecha_pedido').values_list('fecha_pedido', 'id_pedido')[2]
+        for pagina in self.urls_paginadas(reverse('admin_lista_pedidos'), list(fecha)):
+            self.assertSinEscaneosCompletos(pagina, self.admin)
+            self.assertOrdenPorIndice(pagina, 'app_tecnocorp_pedido', self.admin)
+
+    def test_filtros_de_pedidos_del_administrador(self):
+        hoy = timezone.localdate()
+        filtros = [
+            {'estado': 'Entregado'},
+            {'estado': 'Procesando', 'desde': hoy - timedelta(days=3), 'hasta': hoy},
+            {'desde': hoy - timedelta(days=3)},
+            {'hasta': hoy - timedelta(days=3)},
+        ]
+        exportar = reverse('admin_exportar_pedidos')
+        masivo = reverse('admin_actualizar_estado_pedidos')
+        for filtro in filtros:
+            self.assertSoloBusquedas(f'{exportar}?{urlencode(filtro)}', self.admin)
+            self.assertOrdenPorIndice(f'{exportar}?{urlencode(filtro)}', 'app_tecnocorp_pedido', self.admin)
+            self.assertSoloBusquedas(masivo, self.admin, {'nuevo_estado': 'Cancelado', **filtro})
+        seleccion = list(Pedido.objects.values_list('pk', flat=True)[:3])
+        self.assertSoloBusquedas(masivo, self.admin, {'nuevo_estado': 'Cancelado', 'pedidos': seleccion})
+
+
+class PaginacionKeysetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for indice in range(5):
+            Teclado.objects.create(nombre=f'Teclado {indice}', precio=Decimal(100 + indice % 3), categoria='Oficina')
+        cls.orden = [(teclado.precio, teclado.pk) for teclado in Teclado.objects.order_by('precio', 'pk')]
+
+    def pagina(self, cursor=None):
+        return PaginadorKeyset(Teclado.objects.all(), ('precio', 'pk'), por_pagina=2).pagina(cursor)
+
+    def claves(self, pagina):
+        return [(teclado.precio, teclado.pk) for teclado in pagina]
+
+    def test_avanza_y_retrocede(self):
+        primera = self.pagina()
+        self.assertEqual(self.claves(primera), self.orden[:2])
+        self.assertFalse(primera.tiene_anterior)
+        segunda = self.pagina(primera.cursor_siguiente)
+        self.assertEqual(self.claves(segunda), self.orden[2:4])
+        tercera = self.pagina(segunda.cursor_siguiente)
+        self.assertEqual(self.claves(tercera), self.orden[4:])
+        self.assertFalse(tercera.tiene_siguiente)
+        self.assertEqual(self.claves(self.pagina(tercera.cursor_anterior)), self.orden[2:4])
+        regreso = self.pagina(segunda.cursor_anterior)
+        self.assertEqual(self.claves(regreso), self.orden[:2])
+        self.assertFalse(regreso.tiene_anterior)
+
+    def test_cursores_alterados_vuelven_a_la_primera_pagina(self):
+        alterados = [
+            'no-es-base64!',
+            'eyJkIjoicyIsInYiOjV9',
+            codificar_cursor('x', ['100.00', 1]),
+            codificar_cursor(SIGUIENTE, ['100.00']),
+            codificar_cursor(SIGUIENTE, ['caro', 1]),
+            codificar_cursor(SIGUIENTE, ['100.00', '99999999999999999999999']),
+        ]
+        for cursor in alterados:
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.claves(self.pagina(cursor)), self.orden[:2])
+                respuesta = self.client.get(reverse('productos_por_tipo', args=['teclado']), {'cursor': cursor})
+                self.assertEqual(respuesta.status_code, 200)
+
+
+class BusquedaCatalogoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.audifonos = Audifonos.objects.create(
+            nombre='Audífonos Inalámbricos', precio=Decimal('500.00'), categoria='Gamer', color='Negro'
+        )
+        Teclado.objects.create(nombre='Teclado mecánico', precio=Decimal('300.00'), categoria='Oficina')
+
+    def nombres(self, termino):
+        return [entrada.nombre for entrada in buscar_en_catalogo(termino)]
+
+    def test_ignora_acentos_mayusculas_y_acepta_prefijos(self):
+        for termino in ('audifonos', 'AUDIFONOS', 'Audífonos', 'audi', 'inalam', 'gamer'):
+            with self.subTest(termino=termino):
+                self.assertEqual(self.nombres(termino), ['Audífonos Inalámbricos'])
+        self.assertEqual(self.nombres('mecanico'), ['Teclado mecánico'])
+        self.assertEqual(self.nombres('monitor'), [])
+
+    def test_triggers_sincronizan_ediciones_y_eliminaciones(self):
+        self.audifonos.nombre = 'Diadema Bluetooth'
+        self.audifonos.save()
+        self.assertEqual(self.nombres('audifonos'), [])
+        self.assertEqual(self.nombres('diadema'), ['Diadema Bluetooth'])
+        self.audifonos.delete()
+        self.assertEqual(self.nombres('diadema'), [])
+
+
+class DerivadosImagenTests(TestCase):
+    def setUp(self):
+        carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, carpeta)
+        ajuste = override_settings(MEDIA_ROOT=carpeta)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+        cache.clear()
+
+    def guardar_foto(self, nombre, ancho):
+        contenido = BytesIO()
+        Image.new('RGB', (ancho, ancho * 3 // 5), 'red').save(contenido, 'JPEG')
+        return default_storage.save(nombre, ContentFile(contenido.getvalue()))
+
+    def test_nombres_conservan_la_extension_original(self):
+        self.assertEqual(
+            nombre_derivado('productos/pc/images.jfif', 240, 'webp'),
+            'derivados/productos/pc/images.jfif-240.webp',
+        )
+        self.assertNotEqual(
+            nombre_derivado('productos/pc/images.jfif', 240, 'webp'),
+            nombre_derivado('productos/pc/images.jpg', 240, 'webp'),
+        )
+
+    def test_genera_sin_ampliar_y_arma_srcset(self):
+        nombre = self.guardar_foto('productos/pc/images.jpg', 600)
+        self.assertEqual(generar_derivados(nombre), [240, 480])
+        for ancho in (240, 480):
+            for extension in ('webp', 'jpg'):
+                self.assertTrue(default_storage.exists(nombre_derivado(nombre, ancho, extension)))
+        self.assertFalse(default_storage.exists(nombre_derivado(nombre, 800, 'webp')))
+
+        pc = PCArmada.objects.create(nombre='PC', precio=Decimal('900.00'), categoria='Gamer', foto=nombre)
+        plantilla = Template("{% load imagenes %}{% imagen_responsiva foto 'PC' '220px' %}")
+        # La existencia de los derivados se consulta una vez y queda en caché.
+        with mock.patch.object(default_storage, 'exists', side_effect=AssertionError):
+            html = plantilla.render(Context({'foto': pc.foto}))
+        derivados = f'{settings.MEDIA_URL}derivados/{nombre}'
+        original = f'{settings.MEDIA_URL}{nombre} 600w'
+        self.assertIn(f'srcset="{derivados}-240.webp 240w, {derivados}-480.webp 480w, {original}"', html)
+        self.assertIn(f'srcset="{derivados}-240.jpg 240w, {derivados}-480.jpg 480w, {original}"', html)
+        self.assertIn(f'src="{settings.MEDIA_URL}{nombre}"', html)
+
+        cache.clear()
+        self.assertEqual(ancho_original(nombre), 600)
+
+    def test_eliminar_derivados(self):
+        nombre = self.guardar_foto('productos/pc/images.jfif', 300)
+        generar_derivados(nombre)
+        self.assertEqual(derivados_existentes(nombre), [240])
+        eliminar_derivados(nombre)
+        self.assertFalse(default_storage.exists(nombre_derivado(nombre, 240, 'webp')))
+        self.assertFalse(default_storage.exists(nombre_derivado(nombre, 240, 'jpg')))
+        self.assertEqual(derivados_existentes(nombre), [])
+
+
+class ContadoresEntidadTests(TestCase):
+    def test_altas_y_bajas_actualizan_los_totales(self):
+        recalcular_contadores()
+        PCArmada.objects.create(nombre='PC', precio=Decimal('1000'), categoria='Gamer')
+        proveedor = Proveedor.objects.create(id_producto='PC-1', nombre='Proveedor', precio=Decimal('10'))
+        self.assertEqual(obtener_totales()['pc'], 1)
+        self.assertEqual(obtener_totales()['proveedores'], 1)
+        proveedor.delete()
+        PCArmada.objects.all().delete()
+        self.assertEqual(obtener_totales()['pc'], 0)
+        self.assertEqual(obtener_totales()['proveedores'], 0)
+
+    def test_un_fallo_al_contar_deshace_la_alta(self):
+        recalcular_contadores()
+        with mock.patch('app_tecnocorp.signals.actualizar_contador', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                Teclado.objects.create(nombre='Teclado', precio=Decimal('500'), categoria='Gamer')
+        self.assertFalse(Teclado.objects.exists())
+        self.assertEqual(obtener_totales()['teclado'], 0)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class CarritoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.cliente = Usuario.objects.create_user('cliente', 'Cliente', 'cliente@tecnocorp.mx', 'clave-segura')
+        cls.mouse = Mouse.objects.create(nombre='Mouse', precio=Decimal('300'), categoria='Gamer', color='Negro')
+        cls.teclado = Teclado.objects.create(nombre='Teclado', precio=Decimal('800'), categoria='Gamer')
+
+    def test_sumar_linea_incrementa_en_la_base(self):
+        carrito = Carrito.objects.create()
+        sumar_linea(carrito, 'mouse', self.mouse)
+        with CaptureQueriesContext(connection) as consultas:
+            sumar_linea(carrito, 'mouse', self.mouse, 2)
+        self.assertEqual(len(consultas), 1)
+        self.assertIn('"cantidad" = ("app_tecnocorp_lineacarrito"."cantidad" + 2)', consultas[0]['sql'])
+        self.assertEqual(carrito.lineas.get().cantidad, 3)
+
+    def test_iniciar_sesion_fusiona_el_carrito_anonimo(self):
+        propio = Carrito.objects.create(usuario=self.cliente)
+        sumar_linea(propio, 'mouse', self.mouse, 2)
+        self.client.get(reverse('agregar_al_carrito', args=['mouse', self.mouse.pk]))
+        self.client.get(reverse('agregar_al_carrito', args=['teclado', self.teclado.pk]))
+        anonimo = self.client.session['carrito']
+        self.client.post(reverse('iniciar_sesion'), {'usuario': 'cliente', 'contraseña': 'clave-segura'})
+        self.assertFalse(Carrito.objects.filter(pk=anonimo).exists())
+        cantidades = dict(propio.lineas.values_list('tipo', 'cantidad'))
+        self.assertEqual(cantidades, {'mouse': 3, 'teclado': 1})
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class CheckoutTests(TestCase):
+    DATOS = {
+        'metodo_pago': 'paypal', 'calle_envio': 'Reforma', 'colonia_envio': 'Centro',
+        'ciudad_envio': 'CDMX', 'numero_envio': '10',
+    }
+
+    def setUp(self):
+        self.cliente = Usuario.objects.create_user('cliente', 'Cliente', 'cliente@tecnocorp.mx', 'clave-segura')
+        self.mouse = Mouse.objects.create(nombre='Mouse', precio=Decimal('350'), categoria='Gamer', color='Negro')
+        retirado = Teclado.objects.create(nombre='Teclado', precio=Decimal('800'), categoria='Gamer')
+        self.carrito = Carrito.objects.create(usuario=self.cliente)
+        LineaCarrito.objects.create(
+            carrito=self.carrito, tipo='mouse', id_producto=self.mouse.pk,
+            nombre='Mouse', precio=Decimal('300'), cantidad=2,
+        )
+        LineaCarrito.objects.create(
+            carrito=self.carrito, tipo='teclado', id_producto=retirado.pk,
+            nombre='Teclado', precio=Decimal('800'),
+        )
+        retirado.delete()
+        self.client.force_login(self.cliente)
+
+    def test_precios_cambiados_piden_confirmar_antes_de_cobrar(self):
+        respuesta = self.client.post(reverse('checkout'), self.DATOS)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertFalse(Pedido.objects.exists())
+        self.assertEqual(list(self.carrito.lineas.values_list('tipo', 'precio')), [('mouse', Decimal('350'))])
+
+        respuesta = self.client.post(reverse('checkout'), self.DATOS)
+        self.assertRedirects(respuesta, reverse('pedidos_usuario'))
+        pedido = Pedido.objects.get()
+        self.assertEqual(pedido.precio, Decimal('812.00'))
+        self.assertEqual(list(pedido.lineas.values_list('precio_unitario', 'cantidad')), [(Decimal('350'), 2)])
+        self.assertFalse(self.carrito.lineas.exists())
+
+    def test_precio_cambiado_antes_de_escribir_no_se_cobra(self):
+        self.client.post(reverse('checkout'), self.DATOS)
+
+        def sube_precio_y_escribe():
+            Mouse.objects.filter(pk=self.mouse.pk).update(precio=Decimal('400'))
+            return escritura_inmediata()
+
+        with mock.patch('app_tecnocorp.views.escritura_inmediata', sube_precio_y_escribe):
+            respuesta = self.client.post(reverse('checkout'), self.DATOS)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertContains(respuesta, 'Total a pagar: $928.00')
+        self.assertFalse(Pedido.objects.exists())
+        self.assertEqual(list(self.carrito.lineas.values_list('precio', flat=True)), [Decimal('400')])
+
+
+class VentasDiariasTests(TestCase):
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser('admin', 'Admin', 'admin@tecnocorp.mx', 'clave-segura')
+        self.cliente = Usuario.objects.create_user('cliente', 'Cliente', 'cliente@tecnocorp.mx', 'clave-segura')
+        self.client.force_login(self.admin)
+
+    def crear_pedido(self, dias, precio, lineas):
+        with transaction.atomic():
+            pedido = Pedido.objects.create(
+                id_producto='', usuario=self.cliente, detalles='', precio=Decimal(precio),
+                fecha_pedido=timezone.now() - timedelta(days=dias),
+            )
+            lineas_pedido = PedidoLinea.objects.bulk_create([
+                PedidoLinea(pedido=pedido, tipo=tipo, id_producto=1, nombre=tipo,
+                            precio_unitario=Decimal('1'), cantidad=cantidad)
+                for tipo, cantidad in lineas
+            ])
+            registrar_lineas(pedido, lineas_pedido)
+        return pedido
+
+    def ventas(self):
+        return (
+            set(VentaDiaria.objects.exclude(pedidos=0).values_list('fecha', 'estado', 'pedidos', 'ingresos')),
+            set(VentaDiariaTipo.objects.exclude(unidades=0).values_list('fecha', 'estado', 'tipo', 'unidades')),
+        )
+
+    def assertCoincideConElHistorial(self):
+        incrementales = self.ventas()
+        with transaction.atomic():
+            reconstruir_ventas()
+            self.assertEqual(self.ventas(), incrementales)
+            transaction.set_rollback(True)
+
+    def test_acumulados_siguen_al_historial_de_pedidos(self):
+        primero = self.crear_pedido(0, '100.00', [('mouse', 2), ('teclado', 1)])
+        segundo = self.crear_pedido(0, '50.00', [('mouse', 1)])
+        tercero = self.crear_pedido(1, '80.00', [('monitor', 1)])
+        self.assertCoincideConElHistorial()
+        ventas, _ = self.ventas()
+        self.assertIn((timezone.localdate(), 'Procesando', 2, Decimal('150.00')), ventas)
+
+        url = reverse('admin_actualizar_estado_pedido', args=[primero.pk])
+        self.client.post(url, {'estado': 'Procesando', 'fecha_entrega': '2030-01-01 10:00'})
+        self.assertCoincideConElHistorial()
+        self.client.post(url, {'estado': 'En camino'})
+        self.assertCoincideConElHistorial()
+
+        self.client.post(reverse('admin_actualizar_estado_pedidos'), {
+            'nuevo_estado': 'Entregado', 'pedidos': [primero.pk, segundo.pk, tercero.pk],
+        })
+        self.assertEqual(Pedido.objects.filter(estado='Entregado').count(), 3)
+        self.assertCoincideConElHistorial()
+
+        segundo.refresh_from_db()
+        segundo.delete()
+        self.assertCoincideConElHistorial()
+        self.cliente.delete()
+        self.assertEqual(self.ventas(), (set(), set()))
+
+    def test_pedidos_fuera_del_checkout_se_cuentan_una_vez(self):
+        pedido = Pedido.objects.create(id_producto='', usuario=self.cliente, detalles='', precio=Decimal('10.00'))
+        PedidoLinea.objects.create(pedido=pedido, tipo='mouse', id_producto=1, nombre='Mouse',
+                                   precio_unitario=Decimal('10.00'), cantidad=3)
+        self.assertEqual(self.ventas(), (
+            {(timezone.localdate(), 'Procesando', 1, Decimal('10.00'))},
+            {(timezone.localdate(), 'Procesando', 'mouse', 3)},
+        ))
+
+        pedido.estado = 'Entregado'
+        pedido.precio = Decimal('12.00')
+        pedido.save()
+        self.assertCoincideConElHistorial()
+
+        # Una instancia desactualizada no cambia lo que se resta al borrar.
+        Pedido.objects.filter(pk=pedido.pk).update(estado='Procesando')
+        reconstruir_ventas()
+        pedido.delete()
+        self.assertFalse(VentaDiaria.objects.filter(pedidos__lt=0).exists())
+        self.assertFalse(VentaDiariaTipo.objects.filter(unidades__lt=0).exists())
+        self.assertEqual(self.ventas(), (set(), set()))
+
+    def test_ids_fuera_de_rango_se_rechazan(self):
+        pedido = self.crear_pedido(0, '100.00', [('mouse', 1)])
+        for ids in (['0'], [str(2 ** 63)], ['9' * 5000], ['abc']):
+            with self.subTest(ids=ids[0][:20]):
+                respuesta = self.client.post(reverse('admin_actualizar_estado_pedidos'), {
+                    'nuevo_estado': 'Entregado', 'pedidos': ids + [pedido.pk],
+                })
+                self.assertRedirects(respuesta, reverse('admin_lista_pedidos'), fetch_redirect_response=False)
+        self.assertEqual(Pedido.objects.get().estado, 'Procesando')
+
+
+class ImportacionCatalogoTests(TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.carpeta, ignore_errors=True)
+
+    def ruta(self, nombre, contenido=None):
+        ruta = f'{self.carpeta}/{nombre}'
+        if contenido is not None:
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                archivo.write(contenido)
+        return ruta
+
+    def test_exportar_e_importar_conserva_los_productos(self):
+        Mouse.objects.create(nombre='Mouse óptico', precio=Decimal('250.50'), categoria='Oficina', color='Negro')
+        Mouse.objects.create(nombre='Mouse, "gamer"', precio=Decimal('900'), categoria='Gamer', color='Rojo')
+        originales = list(Mouse.objects.order_by('pk').values_list('pk', 'nombre', 'precio', 'color'))
+        for formato in ('csv', 'jsonl'):
+            with self.subTest(formato=formato):
+                ruta = self.ruta(f'mouse.{formato}')
+                call_command('exportar_catalogo', 'mouse', formato=formato, salida=ruta, stderr=StringIO())
+                Mouse.objects.update(precio=Decimal('1'), nombre='Cambiado')
+                call_command('importar_catalogo', 'mouse', ruta, stdout=StringIO(), stderr=StringIO())
+                self.assertEqual(list(Mouse.objects.order_by('pk').values_list('pk', 'nombre', 'precio', 'color')), originales)
+                self.assertEqual(buscar_en_catalogo('optico')[0].nombre, 'Mouse óptico')
+
+    def test_lineas_invalidas_se_rechazan_sin_detener_la_importacion(self):
+        ruta = self.ruta('mouse.jsonl', '\n'.join([
+            '{"nombre": "Uno", "precio": "10", "categoria": "Gamer", "color": "Negro"}',
+            '{"nombre": "Roto", "precio":',
+            '',
+            '["no", "es", "objeto"]',
+            '{"nombre": "Sin precio", "categoria": "Gamer", "color": "Negro"}',
+            '{"nombre": "Dos", "precio": "20", "categoria": "Gamer", "color": "Azul"}',
+        ]))
+        salida = StringIO()
+        errores = StringIO()
+        call_command('importar_catalogo', 'mouse', ruta, stdout=salida, stderr=errores)
+        self.assertEqual(sorted(Mouse.objects.values_list('nombre', flat=True)), ['Dos', 'Uno'])
+        rechazadas = errores.getvalue().splitlines()
+        self.assertEqual([linea.split(':')[0] for linea in rechazadas], ['Línea 2', 'Línea 4', 'Línea 5'])
+        self.assertIn('JSON inválido', rechazadas[0])
+        self.assertIn('2 productos, 3 errores', salida.getvalue())
+
+    def test_reimportar_sin_columna_foto_conserva_la_imagen(self):
+        foto = 'productos/mouse/descarga.jfif'
+        mouse = Mouse.objects.create(nombre='Mouse', precio=Decimal('100'), categoria='Gamer', color='Negro', foto=foto)
+        ruta = self.ruta('proveedor.csv', (
+            'id_mouse,nombre,precio,categoria,color\n'
+            f'{mouse.pk},Mouse nuevo,120,Gamer,Negro\n'
+            ',Otro mouse,80,Oficina,Blanco\n'
+        ))
+        call_command('importar_catalogo', 'mouse', ruta, stdout=StringIO(), stderr=StringIO())
+        mouse.refresh_from_db()
+        self.assertEqual((mouse.nombre, mouse.precio, mouse.foto.name), ('Mouse nuevo', Decimal('120'), foto))
+        self.assertEqual(CatalogoProducto.objects.get(tipo='mouse', id_producto=mouse.pk).foto, foto)
+        self.assertEqual(Mouse.objects.count(), 2)
+
+
+class ExportacionPedidosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_superuser('admin', 'Admin', 'admin@tecnocorp.mx', 'clave-segura')
+        cliente = Usuario.objects.create_user('cliente', 'Cliente', 'cliente@tecnocorp.mx', 'clave-segura')
+        cls.pedidos = [
+            Pedido.objects.create(
+                id_producto='mouse-1', usuario=cliente, detalles=f'Notas, "con comillas" {numero}',
+                precio=Decimal('100'), estado='Entregado' if numero % 2 else 'Procesando',
+            )
+            for numero in range(6)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def exportar(self, **parametros):
+        respuesta = self.client.get(reverse('admin_exportar_pedidos'), {'estado': 'Entregado', **parametros})
+        self.assertTrue(respuesta.streaming)
+        return respuesta, list(respuesta.streaming_content)
+
+    def test_csv_en_flujo_filtrado(self):
+        with mock.patch('app_tecnocorp.exportacion.TAMAÑO_BLOQUE_SALIDA', 1):
+            respuesta, fragmentos = self.exportar()
+        self.assertEqual(respuesta['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertGreater(len(fragmentos), 2)
+        filas = list(csv.reader(b''.join(fragmentos).decode('utf-8').splitlines()))
+        self.assertEqual(filas[0], COLUMNAS_PEDIDOS)
+        entregados = [pedido for pedido in self.pedidos if pedido.estado == 'Entregado']
+        self.assertEqual([int(fila[0]) for fila in filas[1:]], [pedido.pk for pedido in entregados])
+        self.assertEqual(filas[1][-1], entregados[0].detalles)
+
+    def test_gzip_descomprime_al_mismo_csv(self):
+        _, plano = self.exportar()
+        respuesta, comprimido = self.exportar(gzip='1')
+        self.assertEqual(respuesta['Content-Type'], 'application/gzip')
+        self.assertIn('.csv.gz"', respuesta['Content-Disposition'])
+        self.assertEqual(gzip.decompress(b''.join(comprimido)), b''.join(plano))
+
+
+@mock.patch('app_tecnocorp.middleware.hay_replica', return_value=True)
+@mock.patch('app_tecnocorp.routers.hay_replica', return_value=True)
+class ReplicaTests(SimpleTestCase):
+    def peticion(self, metodo='get', cookies=None, escribir=False):
+        router = RouterReplica()
+        bases = []
+
+        def vista(request):
+            bases.append(router.db_for_read(Mouse))
+            if escribir:
+                router.db_for_write(Carrito)
+            bases.append(router.db_for_read(Mouse))
+            bases.append(router.db_for_read(Pedido))
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), metodo)('/')
+        request.COOKIES.update(cookies or {})
+        respuesta = MiddlewareReplica(vista)(request)
+        return bases, respuesta.cookies.get(COOKIE_PRIMARIA)
+
+    def test_lecturas_del_catalogo_van_a_la_replica(self, *_):
+        bases, cookie = self.peticion()
+        self.assertEqual(bases, [ALIAS_REPLICA, ALIAS_REPLICA, None])
+        self.assertIsNone(cookie)
+        self.assertIsNone(RouterReplica().db_for_read(Mouse))
+
+    def test_escribir_fija_la_primaria(self, *_):
+        bases, cookie = self.peticion(escribir=True)
+        self.assertEqual(bases, [ALIAS_REPLICA, None, None])
+        self.assertEqual(cookie['max-age'], settings.SEGUNDOS_PRIMARIA_TRAS_ESCRITURA)
+        bases, cookie = self.peticion('post')
+        self.assertEqual(bases, [None, None, None])
+        self.assertIsNotNone(cookie)
+        bases, cookie = self.peticion(cookies={COOKIE_PRIMARIA: '1'})
+        self.assertEqual(bases, [None, None, None])
+        self.assertIsNone(cookie)
+
+
+class CachePaginasTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mouse = Mouse.objects.create(nombre='Mouse óptico', precio=Decimal('300'), categoria='Gamer', color='Negro')
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('detalle_producto', args=['mouse', self.mouse.pk])
+
+    def visitar(self, cliente_http=None):
+        respuesta = (cliente_http or Client(enforce_csrf_checks=True)).get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta
+
+    def token_de(self, respuesta):
+        return re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', respuesta.content.decode()).group(1)
+
+    def test_hit_y_miss(self):
+        self.assertEqual(self.visitar()['X-Cache-Pagina'], 'MISS')
+        respuesta = self.visitar()
+        self.assertEqual(respuesta['X-Cache-Pagina'], 'HIT')
+        self.assertIn('Cookie', respuesta['Vary'])
+
+    def test_cada_visitante_recibe_su_token_csrf(self):
+        for _ in range(2):
+            cliente_http = Client(enforce_csrf_checks=True)
+            respuesta = self.visitar(cliente_http)
+            self.assertNotIn(MARCADOR_CSRF, respuesta.content.decode())
+            agregar = reverse('agregar_al_carrito', args=['mouse', self.mouse.pk])
+            respuesta = cliente_http.post(agregar, {'csrfmiddlewaretoken': self.token_de(respuesta)})
+            self.assertEqual(respuesta.status_code, 302)
+        self.assertEqual(self.visitar()['X-Cache-Pagina'], 'HIT')
+
+    def test_respuesta_no_guardada_tambien_lleva_token(self):
+        with mock.patch('app_tecnocorp.cache_paginas.respuesta_guardable', return_value=False):
+            respuesta = self.visitar()
+        self.assertFalse(respuesta.has_header('X-Cache-Pagina'))
+        self.assertNotIn(MARCADOR_CSRF, respuesta.content.decode())
+        self.assertTrue(self.token_de(respuesta))
+
+    def test_solo_un_carrito_con_productos_evita_la_cache(self):
+        cliente_http = Client()
+        sesion = cliente_http.session
+        sesion['carrito'] = Carrito.objects.create().pk
+        sesion.save()
+        self.visitar()
+        self.assertEqual(self.visitar(cliente_http)['X-Cache-Pagina'], 'HIT')
+        sumar_linea(Carrito.objects.get(pk=sesion['carrito']), 'mouse', self.mouse)
+        self.assertFalse(self.visitar(cliente_http).has_header('X-Cache-Pagina'))
+
+    def test_guardar_el_producto_invalida_la_pagina(self):
+        self.visitar()
+        self.mouse.nombre = 'Mouse inalámbrico'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mouse.save()
+        respuesta = self.visitar()
+        self.assertEqual(respuesta['X-Cache-Pagina'], 'MISS')
+        self.assertContains(respuesta, 'Mouse inalámbrico')
+
+
+class FragmentoTarjetaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.mouse = Mouse.objects.create(nombre='Mouse óptico', precio=Decimal('300'), categoria='Gamer', color='Negro')
+        self.plantilla = Template("{% include 'usuario/tarjeta_producto.html' %}")
+
+    def tarjeta(self):
+        return self.plantilla.render(Context({'item': {'tipo': 'mouse', 'pk': self.mouse.pk, 'objeto': self.mouse}}))
+
+    def test_la_tarjeta_se_reutiliza_hasta_invalidarla(self):
+        self.assertIn('Mouse óptico', self.tarjeta())
+        self.mouse.nombre = 'Sin guardar'
+        self.assertIn('Mouse óptico', self.tarjeta())
+        invalidar_tarjeta('mouse', self.mouse.pk, self.mouse.actualizado)
+        self.assertIn('Sin guardar', self.tarjeta())
+
+    def test_editar_el_producto_renueva_la_tarjeta_del_listado(self):
+        url = reverse('productos_por_tipo', args=['mouse'])
+        self.assertContains(self.client.get(url), '$300')
+        self.mouse.precio = Decimal('275')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mouse.save()
+        respuesta = self.client.get(url)
+        self.assertContains(respuesta, '$275')
+        self.assertNotContains(respuesta, '$300')
+
+
+class CompresionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for indice in range(30):
+            Mouse.objects.create(nombre=f'Mouse {indice}', precio=Decimal(100 + indice), categoria='Gamer', color='Negro')
+        cls.listado = reverse('productos_por_tipo', args=['mouse'])
+        cls.detalle = reverse('detalle_producto', args=['mouse', Mouse.objects.first().pk])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_gzip_y_vary(self):
+        respuesta = self.client.get(self.listado, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(respuesta['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', respuesta['Vary'])
+        self.assertIn(b'Mouse 23', gzip.decompress(respuesta.content))
+        self.assertTrue(respuesta['ETag'].startswith('W/"'))
+        respuesta = self.client.get(self.listado)
+        self.assertFalse(respuesta.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', respuesta['Vary'])
+
+    def test_brotli_solo_en_paginas_sin_token_csrf(self):
+        falso_brotli = mock.Mock(compress=lambda contenido, quality: b'br')
+        with mock.patch('app_tecnocorp.middleware.brotli', falso_brotli):
+            listado = self.client.get(self.listado, HTTP_ACCEPT_ENCODING='br, gzip')
+            detalle = self.client.get(self.detalle, HTTP_ACCEPT_ENCODING='br, gzip')
+        self.assertEqual(listado['Content-Encoding'], 'br')
+        self.assertEqual(detalle['Content-Encoding'], 'gzip')
+        self.assertIn(b'csrfmiddlewaretoken', gzip.decompress(detalle.content))
+
+    def test_304_sin_cuerpo_ni_codificacion(self):
+        etag = self.client.get(self.listado, HTTP_ACCEPT_ENCODING='gzip')['ETag']
+        respuesta = self.client.get(self.listado, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(respuesta.content, b'')
+        self.assertFalse(respuesta.has_header('Content-Encoding'))
+
+    def test_archivos_y_rangos_no_se_comprimen(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        respuestas = [
+            FileResponse(BytesIO(b'a' * 4096), content_type='text/plain'),
+            HttpResponse(b'a' * 4096, content_type='text/plain', headers={'Accept-Ranges': 'bytes'}),
+        ]
+        for original in respuestas:
+            respuesta = MiddlewareCompresion(lambda request, original=original: original)(request)
+            self.assertFalse(respuesta.has_header('Content-Encoding'))
+
+
+class EstaticosVersionadosTests(SimpleTestCase):
+    def setUp(self):
+        carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, carpeta, ignore_errors=True)
+        ajustes = override_settings(STATIC_ROOT=carpeta)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def servir(self, ruta, codificaciones=''):
+        request = RequestFactory().get(f'{settings.STATIC_URL}{ruta}', HTTP_ACCEPT_ENCODING=codificaciones)
+        respuesta = servir_estatico(request, ruta)
+        contenido = b''.join(respuesta.streaming_content)
+        respuesta.close()
+        return respuesta, contenido
+
+    def test_nombres_con_hash_y_variantes_precomprimidas(self):
+        url = staticfiles_storage.url('css/styles.css')
+        self.assertRegex(url, r'^/static/css/styles\.[0-9a-f]{12}\.css$')
+        ruta = url[len(settings.STATIC_URL):]
+        with open(finders.find('css/styles.css'), 'rb') as archivo:
+            original = archivo.read()
+
+        respuesta, contenido = self.servir(ruta, 'gzip, deflate')
+        self.assertEqual(respuesta['Content-Encoding'], 'gzip')
+        self.assertEqual(respuesta['Cache-Control'], CACHE_INMUTABLE)
+        self.assertIn('Accept-Encoding', respuesta['Vary'])
+        self.assertEqual(gzip.decompress(contenido), original)
+
+        respuesta, contenido = self.servir(ruta)
+        self.assertFalse(respuesta.has_header('Content-Encoding'))
+        self.assertEqual(contenido, original)
+
+        respuesta, _ = self.servir('css/styles.css', 'gzip')
+        self.assertEqual(respuesta['Cache-Control'], CACHE_REVALIDAR)
+
+
+class ServirMediaTests(SimpleTestCase):
+    CONTENIDO = bytes(range(256)) * 8
+
+    def setUp(self):
+        carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, carpeta, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=carpeta)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        default_storage.save('productos/mouse/foto.jpg', ContentFile(self.CONTENIDO))
+        self.url = f'{settings.MEDIA_URL}productos/mouse/foto.jpg'
+
+    def pedir(self, **cabeceras):
+        respuesta = self.client.get(self.url, **cabeceras)
+        contenido = b''.join(respuesta.streaming_content) if respuesta.streaming else respuesta.content
+        respuesta.close()
+        return respuesta, contenido
+
+    def test_rangos(self):
+        respuesta, contenido = self.pedir()
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta['Accept-Ranges'], 'bytes')
+        self.assertEqual(contenido, self.CONTENIDO)
+
+        respuesta, contenido = self.pedir(HTTP_RANGE='bytes=10-19')
+        self.assertEqual(respuesta.status_code, 206)
+        self.assertEqual(respuesta['Content-Range'], f'bytes 10-19/{len(self.CONTENIDO)}')
+        self.assertEqual(contenido, self.CONTENIDO[10:20])
+
+        respuesta, contenido = self.pedir(HTTP_RANGE='bytes=-5')
+        self.assertEqual(contenido, self.CONTENIDO[-5:])
+
+        respuesta, _ = self.pedir(HTTP_RANGE=f'bytes={len(self.CONTENIDO)}-')
+        self.assertEqual(respuesta.status_code, 416)
+        self.assertEqual(respuesta['Content-Range'], f'bytes */{len(self.CONTENIDO)}')
+
+        respuesta, contenido = self.pedir(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"otra-version"')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(contenido, self.CONTENIDO)
+
+    @override_settings(MEDIA_DESCARGA_DELEGADA='x-accel-redirect')
+    def test_x_accel_redirect(self):
+        respuesta, contenido = self.pedir()
+        self.assertEqual(respuesta['X-Accel-Redirect'], f'{settings.MEDIA_PREFIJO_INTERNO}productos/mouse/foto.jpg')
+        self.assertEqual(respuesta['Content-Type'], 'image/jpeg')
+        self.assertTrue(respuesta.has_header('ETag'))
+        self.assertEqual(contenido, b'')
+        respuesta, _ = self.pedir(HTTP_IF_NONE_MATCH=respuesta['ETag'])
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertFalse(respuesta.has_header('X-Accel-Redirect'))
+
+
+class MetricasTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = Usuario.objects.create_superuser('admin', 'Admin', 'admin@tecnocorp.mx', 'clave-segura')
+
+    def conteo(self, texto, metrica, vista):
+        coincidencia = re.search(rf'^{metrica}_count{{vista="{vista}"}} (\d+)$', texto, re.MULTILINE)
+        return int(coincidencia.group(1)) if coincidencia else 0
+
+    def test_server_timing_y_exposicion_prometheus(self):
+        antes = registro.texto_prometheus()
+        respuesta = self.client.get(reverse('lista_productos'))
+        self.assertRegex(
+            respuesta['Server-Timing'],
+            r'^sql;dur=[\d.]+;desc="[1-9]\d* consultas", plantillas;dur=[\d.]+, total;dur=[\d.]+$',
+        )
+
+        self.assertRedirects(self.client.get(reverse('metricas')), reverse('iniciar_sesion') + '?next=' + reverse('metricas'))
+        self.client.force_login(self.admin)
+        respuesta = self.client.get(reverse('metricas'))
+        self.assertEqual(respuesta['Content-Type'], TIPO_PROMETHEUS)
+        texto = respuesta.content.decode()
+        self.assertIn('# TYPE tecnocorp_peticion_segundos histogram', texto)
+        self.assertIn('tecnocorp_sql_consultas_bucket{vista="lista_productos",le="+Inf"}', texto)
+        for metrica in HISTOGRAMAS:
+            self.assertEqual(
+                self.conteo(texto, metrica, 'lista_productos'),
+                self.conteo(antes, metrica, 'lista_productos') + 1,
+            )
+
+
+MODELOS_SEMBRADOS = [
+    ('pc', PCArmada, {}),
+    ('teclado', Teclado, {}),
+    ('monitor', Monitor, {'tamaño': '27"'}),
+    ('mouse', Mouse, {'color': 'Negro'}),
+    ('audifonos', Audifonos, {'color': 'Rojo'}),
+]
+
+PRODUCTOS_POR_TIPO = 30
+PEDIDOS_POR_CLIENTE = 40
+LINEAS_CARRITO_POR_TIPO = 3
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ConteoDeConsultasTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_superuser('admin', 'Admin', 'admin@tecnocorp.mx', 'clave-segura')
+        cls.cliente = Usuario.objects.create_user(
+            'cliente', 'Cliente', 'cliente@tecnocorp.mx', 'clave-segura',
+            ciudad='CDMX', calle='Reforma', colonia='Centro', numero_casa='10',
+        )
+        cls.carrito = Carrito.objects.create(usuario=cls.cliente)
+        cls.sembrar()
+        cls.mouse = Mouse.objects.order_by('pk').first()
+        cls.proveedor = Proveedor.objects.order_by('pk').first()
+        cls.pedido = Pedido.objects.order_by('pk').first()
+
+    @classmethod
+    def sembrar(cls):
+        ahora = timezone.now()
+        for tipo, modelo, extra in MODELOS_SEMBRADOS:
+            productos = [
+                modelo.objects.create(
+                    nombre=f'{tipo} {indice}',
+                    precio=Decimal(100 + indice),
+                    categoria='Gamer' if indice % 2 else 'Oficina',
+                    **extra,
+                )
+                for indice in range(PRODUCTOS_POR_TIPO)
+            ]
+            for producto in productos[-LINEAS_CARRITO_POR_TIPO:]:
+                LineaCarrito.objects.create(
+                    carrito=cls.carrito, tipo=tipo, id_producto=producto.pk,
+                    nombre=producto.nombre, precio=producto.precio, categoria=producto.categoria,
+                )
+        for indice in range(PRODUCTOS_POR_TIPO):
+            Proveedor.objects.create(id_producto=f'mouse-{indice}', nombre=f'Proveedor {indice}', precio=Decimal(90))
+        # Cada pedido cae en un día nuevo para que también crezcan los grupos de ventas diarias.
+        dias_previos = Pedido.objects.count()
+        for indice in range(PEDIDOS_POR_CLIENTE):
+            pedido = Pedido.objects.create(
+                id_producto='mouse-1,teclado-1',
+                usuario=cls.cliente,
+                detalles='Mouse 1 x1 | Teclado 1 x1',
+                precio=Decimal('250.00'),
+                fecha_pedido=ahora - timedelta(days=dias_previos + indice),
+                estado='Entregado' if indice % 2 else 'Procesando',
+            )
+            PedidoLinea.objects.bulk_create([
+                PedidoLinea(pedido=pedido, tipo='mouse', id_producto=1, nombre='Mouse 1',
+                            precio_unitario=Decimal('100.00'), cantidad=1),
+                PedidoLinea(pedido=pedido, tipo='teclado', id_producto=1, nombre='Teclado 1',
+                            precio_unitario=Decimal('150.00'), cantidad=1),
+            ])
+        reconstruir_ventas()
+
+    def carrito_anonimo(self, cliente_http):
+        carrito = Carrito.objects.create()
+        for producto in Mouse.objects.order_by('-pk')[:LINEAS_CARRITO_POR_TIPO * 2]:
+            LineaCarrito.objects.create(
+                carrito=carrito, tipo='mouse', id_producto=producto.pk,
+                nombre=producto.nombre, precio=producto.precio,
+            )
+        sesion = cliente_http.session
+        sesion['carrito'] = carrito.pk
+        sesion.save()
+
+    def rutas(self):
+        mouse = ['mouse', self.mouse.pk]
+        producto = {'nombre': 'Mouse nuevo', 'precio': '120.00', 'categoria': 'Gamer', 'color': 'Azul'}
+        proveedor = {'id_producto': 'mouse-1', 'nombre': 'Proveedor nuevo', 'precio': '95.00'}
+        checkout = {
+            'metodo_pago': 'paypal', 'calle_envio': 'Reforma', 'colonia_envio': 'Centro',
+            'ciudad_envio': 'CDMX', 'numero_envio': '10',
+        }
+        registro = {
+            'nombre': 'Nuevo', 'usuario': 'nuevo', 'correo': 'nuevo@tecnocorp.mx',
+            'contraseña': 'clave-segura', 'confirmar_contraseña': 'clave-segura',
+        }
+        acceso = {'usuario': 'cliente', 'contraseña': 'clave-segura'}
+        # (nombre, método, argumentos, datos, usuario, preparar, estado, consultas)
+        return [
+            ('index', 'get', [], None, None, None, 200, 1),
+            ('lista_productos', 'get', [], None, None, None, 200, 1),
+            ('lista_productos', 'get', [], {'busqueda': 'mouse'}, None, None, 200, 1),
+            ('productos_por_tipo', 'get', ['mouse'], None, None, None, 200, 3),
+            ('productos_por_tipo', 'get', ['mouse'], {'categoria': 'Gamer', 'orden': '-precio'}, None, None, 200, 3),
+            ('detalle_producto', 'get', mouse, None, None, None, 200, 2),
+            ('agregar_al_carrito', 'get', mouse, None, None, None, 302, 10),
+            ('agregar_al_carrito', 'get', mouse, None, 'cliente', None, 302, 8),
+            ('ver_carrito', 'get', [], None, 'cliente', None, 200, 5),
+            ('actualizar_cantidad_carrito', 'post', [f'mouse-{self.mouse.pk}'], {'cantidad': 2}, 'cliente', None, 302, 4),
+            ('eliminar_del_carrito', 'get', [f'mouse-{self.mouse.pk}'], None, 'cliente', None, 302, 4),
+            ('vaciar_carrito', 'get', [], None, 'cliente', None, 302, 4),
+            ('checkout', 'get', [], None, 'cliente', None, 200, 9),
+            ('checkout', 'post', [], checkout, 'cliente', None, 302, 19),
+            ('registro', 'get', [], None, None, None, 200, 0),
+            ('registro', 'post', [], registro, None, self.carrito_anonimo, 302, 24),
+            ('iniciar_sesion', 'get', [], None, None, None, 200, 0),
+            ('iniciar_sesion', 'post', [], acceso, None, self.carrito_anonimo, 302, 22),
+            ('cerrar_sesion', 'get', [], None, 'cliente', None, 302, 4),
+            ('perfil_usuario', 'get', [], None, 'cliente', None, 200, 3),
+            ('pedidos_usuario', 'get', [], None, 'cliente', None, 200, 3),
+            ('buscar_productos', 'get', [], {'busqueda': 'mouse'}, None, None, 302, 0),
+            ('panel_admin', 'get', [], None, 'admin', None, 200, 3),
+            ('admin_lista_productos', 'get', ['mouse'], None, 'admin', None, 200, 3),
+            ('admin_crear_producto', 'get', ['mouse'], None, 'admin', None, 200, 2),
+            ('admin_crear_producto', 'post', ['mouse'], producto, 'admin', None, 302, 7),
+            ('admin_editar_producto', 'get', mouse, None, 'admin', None, 200, 3),
+            ('admin_editar_producto', 'post', mouse, producto, 'admin', None, 302, 7),
+            ('admin_eliminar_producto', 'get', mouse, None, 'admin', None, 302, 6),
+            ('admin_lista_proveedores', 'get', [], None, 'admin', None, 200, 3),
+            ('admin_crear_proveedor', 'get', [], None, 'admin', None, 200, 2),
+            ('admin_crear_proveedor', 'post', [], proveedor, 'admin', None, 302, 6),
+            ('admin_editar_proveedor', 'get', [self.proveedor.pk], None, 'admin', None, 200, 3),
+            ('admin_editar_proveedor', 'post', [self.proveedor.pk], proveedor, 'admin', None, 302, 6),
+            ('admin_eliminar_proveedor', 'get', [self.proveedor.pk], None, 'admin', None, 302, 5),
+            ('admin_lista_pedidos', 'get', [], None, 'admin', None, 200, 3),
+            ('admin_actualizar_estado_pedidos', 'post', [], {'nuevo_estado': 'En camino', 'estado': 'Procesando'},
+             'admin', None, 302, 9),
+            ('admin_exportar_pedidos', 'get', [], {'gzip': '1'}, 'admin', None, 200, 3),
+            ('admin_actualizar_estado_pedido', 'post', [self.pedido.pk], {'estado': 'En camino'}, 'admin', None, 302, 12),
+            ('admin_detalle_usuario', 'get', [self.cliente.pk], None, 'admin', None, 200, 4),
+            ('admin_analitica', 'get', [], None, 'admin', None, 200, 4),
+            ('metricas', 'get', [], None, 'admin', None, 200, 2),
+        ]
+
+    def consultas_de(self, metodo, url, datos, usuario, preparar):
+        cliente_http = Client()
+        if usuario is not None:
+            cliente_http.force_login(getattr(self, usuario))
+        if preparar is not None:
+            preparar(cliente_http)
+        cache.clear()
+        # Cada petición se deshace para que todas partan del mismo conjunto de datos.
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as consultas:
+                respuesta = getattr(cliente_http, metodo)(url, datos)
+                if respuesta.streaming:
+                    b''.join(respuesta.streaming_content)
+            transaction.set_rollback(True)
+        return respuesta, len(consultas)
+
+    def medir_rutas(self):
+        conteos = []
+        for nombre, metodo, argumentos, datos, usuario, preparar, estado, esperadas in self.rutas():
+            respuesta, total = self.consultas_de(metodo, reverse(nombre, args=argumentos), datos, usuario, preparar)
+            conteos.append((nombre, metodo, estado, esperadas, respuesta.status_code, total))
+        return conteos
+
+    def test_consultas_no_dependen_de_los_datos(self):
+        antes = self.medir_rutas()
+        self.sembrar()
+        despues = self.medir_rutas()
+        for (nombre, metodo, estado, esperadas, codigo, total), (*_, codigo_despues, total_despues) in zip(antes, despues):
+            with self.subTest(ruta=nombre, metodo=metodo):
+                self.assertEqual(codigo, estado)
+                self.assertEqual(codigo_despues, estado)
+                self.assertEqual(total, esperadas)
+                self.assertEqual(total_despues, esperadas)
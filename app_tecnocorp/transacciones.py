@@ -0,0 +1,25 @@
+from contextlib import contextmanager
+
+from django.db import transaction
+
+MODO_ESCRITURA = 'IMMEDIATE'
+
+
+@contextmanager
+def escritura_inmediata(using=None):
+    # BEGIN IMMEDIATE toma el candado de escritura al abrir la transacción, así una transacción que lee
+    # antes de escribir no se bloquea con otra al subir de lectura a escritura. Las lecturas siguen diferidas.
+    conexion = transaction.get_connection(using)
+    if conexion.vendor != 'sqlite' or conexion.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+    conexion.ensure_connection()
+    anterior = conexion.transaction_mode
+    conexion.transaction_mode = MODO_ESCRITURA
+    try:
+        with transaction.atomic(using=using):
+            conexion.transaction_mode = anterior
+            yield
+    finally:
+        conexion.transaction_mode = anterior
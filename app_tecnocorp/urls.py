@@ -1,11 +1,19 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+
+def vista_catalogo(nombre):
+    if settings.VISTAS_CATALOGO_ASINCRONAS:
+        return getattr(views, f'{nombre}_asincrono')
+    return getattr(views, nombre)
+
+
 urlpatterns = [
-    path('', views.index, name='index'),
-    path('productos/', views.lista_productos, name='lista_productos'),
-    path('productos/<str:tipo>/', views.productos_por_tipo, name='productos_por_tipo'),
-    path('producto/<str:tipo>/<int:pk>/', views.detalle_producto, name='detalle_producto'),
+    path('', vista_catalogo('index'), name='index'),
+    path('productos/', vista_catalogo('lista_productos'), name='lista_productos'),
+    path('productos/<str:tipo>/', vista_catalogo('productos_por_tipo'), name='productos_por_tipo'),
+    path('producto/<str:tipo>/<int:pk>/', vista_catalogo('detalle_producto'), name='detalle_producto'),
     path('carrito/agregar/<str:tipo>/<int:pk>/', views.agregar_al_carrito, name='agregar_al_carrito'),
     path('carrito/', views.ver_carrito, name='ver_carrito'),
     path('carrito/actualizar/<str:clave>/', views.actualizar_cantidad_carrito, name='actualizar_cantidad_carrito'),
@@ -29,6 +37,10 @@ urlpatterns = [
     path('admin-tecnocorp/proveedores/<int:pk>/editar/', views.admin_editar_proveedor, name='admin_editar_proveedor'),
     path('admin-tecnocorp/proveedores/<int:pk>/eliminar/', views.admin_eliminar_proveedor, name='admin_eliminar_proveedor'),
     path('admin-tecnocorp/pedidos/', views.admin_lista_pedidos, name='admin_lista_pedidos'),
+    path('admin-tecnocorp/pedidos/estado/', views.admin_actualizar_estado_pedidos, name='admin_actualizar_estado_pedidos'),
+    path('admin-tecnocorp/pedidos/exportar/', views.admin_exportar_pedidos, name='admin_exportar_pedidos'),
     path('admin-tecnocorp/pedidos/<int:pk>/estado/', views.admin_actualizar_estado_pedido, name='admin_actualizar_estado_pedido'),
     path('admin-tecnocorp/usuarios/<int:pk>/', views.admin_detalle_usuario, name='admin_detalle_usuario'),
+    path('admin-tecnocorp/analitica/', views.admin_analitica, name='admin_analitica'),
+    path('metrics', views.metricas, name='metricas'),
 ]
\ No newline at end of file
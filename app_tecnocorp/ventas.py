@@ -0,0 +1,218 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connections, router, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Pedido, PedidoLinea, VentaDiaria, VentaDiariaTipo
+from .transacciones import escritura_inmediata
+
+ESTADO_CANCELADO = 'Cancelado'
+TAMAÑO_LOTE_VENTAS = 500
+CAMPOS_VENTA = ['fecha_pedido', 'estado', 'precio']
+
+
+def acumular(modelo, claves, incrementos, filas):
+    filas = [(clave, valores) for clave, valores in filas.items() if any(valores)]
+    if not filas:
+        return
+    conexion = connections[router.db_for_write(modelo)]
+    nombre = conexion.ops.quote_name
+    tabla = nombre(modelo._meta.db_table)
+    campos = [modelo._meta.get_field(campo) for campo in claves + incrementos]
+    columnas = ', '.join(nombre(campo.column) for campo in campos)
+    conflicto = ', '.join(nombre(campo.column) for campo in campos[:len(claves)])
+    sumas = ', '.join(
+        f'{nombre(campo.column)} = {tabla}.{nombre(campo.column)} + excluded.{nombre(campo.column)}'
+        for campo in campos[len(claves):]
+    )
+    marcadores = '(' + ', '.join(['%s'] * len(campos)) + ')'
+    with conexion.cursor() as cursor:
+        for desde in range(0, len(filas), TAMAÑO_LOTE_VENTAS):
+            lote = filas[desde:desde + TAMAÑO_LOTE_VENTAS]
+            parametros = [
+                campo.get_db_prep_save(valor, conexion)
+                for clave, valores in lote
+                for campo, valor in zip(campos, clave + valores)
+            ]
+            cursor.execute(
+                f'INSERT INTO {tabla} ({columnas}) VALUES {", ".join([marcadores] * len(lote))} '
+                f'ON CONFLICT ({conflicto}) DO UPDATE SET {sumas}',
+                parametros,
+            )
+
+
+class MovimientosVenta:
+    def __init__(self):
+        self.ventas = {}
+        self.unidades = {}
+
+    def sumar(self, fecha, estado, pedidos, ingresos, unidades_por_tipo, signo=1):
+        anteriores = self.ventas.get((fecha, estado), (0, 0))
+        self.ventas[fecha, estado] = (anteriores[0] + signo * pedidos, anteriores[1] + signo * ingresos)
+        for tipo, unidades in unidades_por_tipo.items():
+            anteriores = self.unidades.get((fecha, estado, tipo), (0,))
+            self.unidades[fecha, estado, tipo] = (anteriores[0] + signo * unidades,)
+
+    def aplicar(self):
+        # Un INSERT ... ON CONFLICT por tabla suma todos los grupos de una vez.
+        acumular(VentaDiaria, ['fecha', 'estado'], ['pedidos', 'ingresos'], self.ventas)
+        acumular(VentaDiariaTipo, ['fecha', 'estado', 'tipo'], ['unidades'], self.unidades)
+
+
+def unidades_de_lineas(lineas):
+    unidades = defaultdict(int)
+    for linea in lineas:
+        unidades[linea.tipo] += linea.cantidad
+    return unidades
+
+
+def unidades_de_pedido(pedido):
+    return dict(
+        pedido.lineas.values('tipo').annotate(total=Sum('cantidad')).values_list('tipo', 'total')
+    )
+
+
+def venta_guardada(pk, using=None):
+    # Fecha, estado y total con los que el pedido está contado ahora en los acumulados.
+    return Pedido.objects.using(using).filter(pk=pk).values_list(*CAMPOS_VENTA).first()
+
+
+def venta_de(pedido):
+    return tuple(Pedido._meta.get_field(campo).to_python(getattr(pedido, campo)) for campo in CAMPOS_VENTA)
+
+
+def mover_pedido(pedido, anterior, actual, unidades=None):
+    if anterior == actual:
+        return
+    if unidades is None:
+        unidades = unidades_de_pedido(pedido)
+    movimientos = MovimientosVenta()
+    if anterior is not None:
+        fecha, estado, precio = anterior
+        movimientos.sumar(timezone.localdate(fecha), estado, 1, precio, unidades, signo=-1)
+    if actual is not None:
+        fecha, estado, precio = actual
+        movimientos.sumar(timezone.localdate(fecha), estado, 1, precio, unidades)
+    movimientos.aplicar()
+
+
+def registrar_lineas(pedido, lineas):
+    # El pedido ya se contó al guardarse; bulk_create no emite señales y sus unidades se suman aquí.
+    movimientos = MovimientosVenta()
+    fecha = timezone.localdate(pedido.fecha_pedido)
+    movimientos.sumar(fecha, pedido.estado, 0, 0, unidades_de_lineas(lineas))
+    movimientos.aplicar()
+
+
+def actualizar_estado_pedidos(pedidos, estado, fecha_entrega=None):
+    cambios = {'estado': estado}
+    if fecha_entrega:
+        cambios['fecha_entrega'] = fecha_entrega
+    with escritura_inmediata():
+        # estado IN (...) deja que el índice (estado, fecha_pedido) acote la búsqueda; un NOT = lo recorre entero.
+        movidos = pedidos.filter(estado__in=[otro for otro, _ in Pedido.ESTADOS if otro != estado])
+        grupos = {}
+        ventas = (
+            movidos.annotate(fecha=TruncDate('fecha_pedido'))
+            .values('fecha', 'estado')
+            .annotate(pedidos=Count('id_pedido'), ingresos=Sum('precio'))
+            .order_by()
+        )
+        for venta in ventas:
+            grupos[venta['fecha'], venta['estado']] = {
+                'pedidos': venta['pedidos'],
+                'ingresos': venta['ingresos'],
+                'unidades': {},
+            }
+        unidades = (
+            PedidoLinea.objects.filter(pedido__in=movidos)
+            .annotate(fecha=TruncDate('pedido__fecha_pedido'))
+            .values('fecha', 'tipo', estado=F('pedido__estado'))
+            .annotate(unidades=Sum('cantidad'))
+            .order_by()
+        )
+        for fila in unidades:
+            grupos[fila['fecha'], fila['estado']]['unidades'][fila['tipo']] = fila['unidades']
+
+        actualizados = pedidos.update(**cambios)
+
+        movimientos = MovimientosVenta()
+        for (fecha, estado_anterior), grupo in grupos.items():
+            movimientos.sumar(fecha, estado_anterior, grupo['pedidos'], grupo['ingresos'], grupo['unidades'], signo=-1)
+            movimientos.sumar(fecha, estado, grupo['pedidos'], grupo['ingresos'], grupo['unidades'])
+        movimientos.aplicar()
+    return actualizados
+
+
+def reconstruir_ventas():
+    with transaction.atomic():
+        VentaDiariaTipo.objects.all().delete()
+        VentaDiaria.objects.all().delete()
+        ventas = (
+            Pedido.objects.annotate(fecha=TruncDate('fecha_pedido'))
+            .values('fecha', 'estado')
+            .annotate(pedidos=Count('id_pedido'), ingresos=Sum('precio'))
+            .order_by()
+        )
+        VentaDiaria.objects.bulk_create(
+            [VentaDiaria(**venta) for venta in ventas.iterator()],
+            batch_size=500,
+        )
+        unidades = (
+            PedidoLinea.objects.annotate(fecha=TruncDate('pedido__fecha_pedido'))
+            .values('fecha', 'tipo', estado=F('pedido__estado'))
+            .annotate(unidades=Sum('cantidad'))
+            .order_by()
+        )
+        VentaDiariaTipo.objects.bulk_create(
+            [VentaDiariaTipo(**fila) for fila in unidades.iterator()],
+            batch_size=500,
+        )
+    return VentaDiaria.objects.count()
+
+
+def resumen_ventas(dias):
+    hoy = timezone.localdate()
+    inicio = hoy - timedelta(days=dias - 1)
+    por_dia = {
+        inicio + timedelta(days=desplazamiento): {'pedidos': 0, 'ingresos': Decimal('0.00')}
+        for desplazamiento in range(dias)
+    }
+    por_estado = defaultdict(lambda: {'pedidos': 0, 'ingresos': Decimal('0.00')})
+    for venta in VentaDiaria.objects.filter(fecha__gte=inicio, fecha__lte=hoy):
+        por_estado[venta.estado]['pedidos'] += venta.pedidos
+        por_estado[venta.estado]['ingresos'] += venta.ingresos
+        if venta.estado != ESTADO_CANCELADO:
+            por_dia[venta.fecha]['pedidos'] += venta.pedidos
+            por_dia[venta.fecha]['ingresos'] += venta.ingresos
+    unidades = (
+        VentaDiariaTipo.objects.filter(fecha__gte=inicio, fecha__lte=hoy)
+        .exclude(estado=ESTADO_CANCELADO)
+        .values('tipo')
+        .annotate(unidades=Sum('unidades'))
+        .order_by('-unidades')
+    )
+
+    maximo = max((datos['ingresos'] for datos in por_dia.values()), default=0) or 1
+    serie = [
+        {
+            'fecha': fecha,
+            'pedidos': datos['pedidos'],
+            'ingresos': datos['ingresos'],
+            'porcentaje': round(datos['ingresos'] * 100 / maximo, 1),
+        }
+        for fecha, datos in sorted(por_dia.items())
+    ]
+    return {
+        'inicio': inicio,
+        'fin': hoy,
+        'serie': serie,
+        'por_estado': [(estado, por_estado[estado]) for estado, _ in Pedido.ESTADOS if estado in por_estado],
+        'unidades_por_tipo': list(unidades),
+        'total_pedidos': sum(dia['pedidos'] for dia in serie),
+        'total_ingresos': sum((dia['ingresos'] for dia in serie), Decimal('0.00')),
+    }
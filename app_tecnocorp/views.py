@@ -1,13 +1,55 @@
-from decimal import Decimal
+import os
 from datetime import timedelta
+from functools import partial
+from urllib.parse import urlencode
 
+from asgiref.sync import sync_to_async
 from django.contrib import messages
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
-from django.shortcuts import get_object_or_404, redirect, render
+from django.db import router, transaction
+from django.db.models.functions import Substr
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, get_object_or_404, redirect, render
+from django.urls import reverse
 from django.utils import timezone
-
+from django.utils._os import safe_join
+
+from .archivos import (
+    CACHE_INMUTABLE,
+    CACHE_REVALIDAR,
+    respuesta_archivo,
+    tipo_de_archivo,
+    variante_precomprimida,
+)
+from .cache_paginas import cache_pagina_anonima, respuesta_condicional
+from .carrito import (
+    calcular_totales_carrito,
+    calcular_totales_lineas,
+    fijar_cantidad,
+    fusionar_carrito,
+    lineas_de,
+    obtener_carrito,
+    quitar_linea,
+    revalidar_precios,
+    sumar_linea,
+    vaciar,
+)
+from .catalogo import (
+    aobtener_destacados,
+    aobtener_facetas,
+    buscar_en_catalogo,
+    invalidar_tarjeta,
+    obtener_destacados,
+    obtener_facetas,
+    validadores_producto,
+    validadores_tipo,
+)
+from .contadores import obtener_totales
+from .exportacion import comprimir_gzip, csv_pedidos
 from .forms import (
     FormularioRegistroUsuario,
     FormularioAcceso,
@@ -20,7 +62,10 @@ from .forms import (
     FormularioProveedor,
     FormularioCheckout,
     FormularioBusqueda,
+    FormularioFacetas,
     FormularioEstadoPedido,
+    FormularioFiltroPedidos,
+    FormularioEstadoMasivo,
 )
 from .models import (
     Usuario,
@@ -31,53 +76,68 @@ from .models import (
     Audifonos,
     Proveedor,
     Pedido,
+    PedidoLinea,
+    CatalogoProducto,
 )
+from .imagenes import programar_derivados, programar_eliminacion_derivados
+from .metricas import registro
+from .paginacion import apaginar, paginar
+from .transacciones import escritura_inmediata
+from .ventas import actualizar_estado_pedidos, registrar_lineas, resumen_ventas
 
 MAPEO_PRODUCTOS = {
     'pc': {
         'modelo': PCArmada,
         'formulario': FormularioPCArmada,
-        'nombre': 'PC Armadas'
+        'nombre': 'PC Armadas',
+        'facetas': ['categoria'],
     },
     'teclado': {
         'modelo': Teclado,
         'formulario': FormularioTeclado,
-        'nombre': 'Teclados'
+        'nombre': 'Teclados',
+        'facetas': ['categoria'],
     },
     'monitor': {
         'modelo': Monitor,
         'formulario': FormularioMonitor,
-        'nombre': 'Monitores'
+        'nombre': 'Monitores',
+        'facetas': ['categoria', 'tamaño'],
     },
     'mouse': {
         'modelo': Mouse,
         'formulario': FormularioMouse,
-        'nombre': 'Mouses'
+        'nombre': 'Mouses',
+        'facetas': ['categoria', 'color'],
     },
     'audifonos': {
         'modelo': Audifonos,
         'formulario': FormularioAudifonos,
-        'nombre': 'Audífonos'
+        'nombre': 'Audífonos',
+        'facetas': ['categoria', 'color'],
     },
 }
 
+LONGITUD_RESUMEN_DETALLES = 120
 
-def obtener_carrito(request):
-    return request.session.get('carrito', {})
+DIAS_ANALITICA = 30
+MAXIMO_DIAS_ANALITICA = 365
 
+TIPO_PROMETHEUS = 'text/plain; version=0.0.4; charset=utf-8'
 
-def guardar_carrito(request, carrito):
-    request.session['carrito'] = carrito
-    request.session.modified = True
+arender = sync_to_async(render)
 
 
-def calcular_totales_carrito(carrito):
-    subtotal = Decimal('0.00')
-    for datos in carrito.values():
-        subtotal += Decimal(datos['precio']) * datos['cantidad']
-    impuestos = subtotal * Decimal('0.16')
-    total = subtotal + impuestos
-    return subtotal, impuestos, total
+def programar_derivados_producto(formulario, tipo):
+    producto = formulario.instance
+    if 'foto' not in formulario.changed_data:
+        return
+    anterior = formulario.initial.get('foto')
+    if anterior and anterior.name != producto.foto.name:
+        transaction.on_commit(partial(programar_eliminacion_derivados, anterior.name))
+    if producto.foto:
+        al_terminar = partial(invalidar_tarjeta, tipo, producto.pk, producto.actualizado)
+        transaction.on_commit(partial(programar_derivados, producto.foto.name, al_terminar))
 
 
 def construir_tarjeta(producto, tipo):
@@ -89,89 +149,182 @@ def construir_tarjeta(producto, tipo):
     }
 
 
-def index(request):
-    productos_destacados = []
-    for clave, datos in MAPEO_PRODUCTOS.items():
-        objetos = datos['modelo'].objects.all()[:3]
-        for objeto in objetos:
-            productos_destacados.append(construir_tarjeta(objeto, clave))
-    contexto = {
-        'productos_destacados': productos_destacados,
+def construir_tarjeta_catalogo(entrada):
+    return {
+        'tipo': entrada.tipo,
+        'objeto': entrada,
+        'pk': entrada.id_producto,
+        'nombre_tipo': MAPEO_PRODUCTOS[entrada.tipo]['nombre'],
+    }
+
+
+def validadores_productos_por_tipo(request, tipo):
+    if tipo not in MAPEO_PRODUCTOS:
+        return None
+    return validadores_tipo(tipo)
+
+
+def validadores_detalle_producto(request, tipo, pk):
+    if tipo not in MAPEO_PRODUCTOS:
+        return None
+    return validadores_producto(tipo, pk)
+
+
+def contexto_index(destacados):
+    return {
+        'productos_destacados': [construir_tarjeta_catalogo(entrada) for entrada in destacados],
         'formulario_busqueda': FormularioBusqueda(),
     }
-    return render(request, 'usuario/index.html', contexto)
 
 
-def lista_productos(request):
-    productos = []
-    termino = request.GET.get('busqueda', '')
-    for clave, datos in MAPEO_PRODUCTOS.items():
-        queryset = datos['modelo'].objects.all()
-        if termino:
-            queryset = queryset.filter(
-                Q(nombre__icontains=termino) |
-                Q(categoria__icontains=termino)
-            )
-        for objeto in queryset:
-            productos.append(construir_tarjeta(objeto, clave))
-    contexto = {
-        'productos': productos,
+def contexto_lista_productos(termino, entradas, pagina):
+    return {
+        'productos': [construir_tarjeta_catalogo(entrada) for entrada in entradas],
+        'pagina': pagina,
         'termino': termino,
         'formulario_busqueda': FormularioBusqueda(initial={'busqueda': termino}),
     }
+
+
+def formulario_facetas(request, tipo):
+    formulario = FormularioFacetas(request.GET, facetas=MAPEO_PRODUCTOS[tipo]['facetas'])
+    formulario.is_valid()
+    return formulario
+
+
+def filtros_facetas(formulario, resumen):
+    seleccion = formulario.seleccion()
+    return [
+        {
+            'campo': campo,
+            'etiqueta': formulario.fields[campo].label,
+            'valores': [
+                {'valor': valor, 'total': total, 'seleccionado': valor in seleccion[campo]}
+                for valor, total in resumen['conteos'][campo]
+            ],
+        }
+        for campo in formulario.facetas
+    ]
+
+
+def contexto_productos_por_tipo(tipo, pagina, formulario, resumen):
+    return {
+        'productos': [construir_tarjeta(objeto, tipo) for objeto in pagina],
+        'pagina': pagina,
+        'titulo_categoria': MAPEO_PRODUCTOS[tipo]['nombre'],
+        'formulario_busqueda': FormularioBusqueda(),
+        'formulario_facetas': formulario,
+        'filtros_facetas': filtros_facetas(formulario, resumen),
+        'resumen_facetas': resumen,
+    }
+
+
+def contexto_detalle_producto(tipo, producto):
+    return {
+        'producto': producto,
+        'tipo': tipo,
+        'formulario_busqueda': FormularioBusqueda(),
+    }
+
+
+@cache_pagina_anonima
+def index(request):
+    contexto = contexto_index(obtener_destacados())
+    return render(request, 'usuario/index.html', contexto)
+
+
+@cache_pagina_anonima
+def lista_productos(request):
+    termino = request.GET.get('busqueda', '')
+    pagina = None
+    if termino:
+        entradas = buscar_en_catalogo(termino)
+    else:
+        pagina = paginar(request, CatalogoProducto.objects.all(), ('precio', 'id'))
+        entradas = pagina.objetos
+    contexto = contexto_lista_productos(termino, entradas, pagina)
     return render(request, 'usuario/productos.html', contexto)
 
 
+@respuesta_condicional(validadores_productos_por_tipo)
+@cache_pagina_anonima
 def productos_por_tipo(request, tipo):
     if tipo not in MAPEO_PRODUCTOS:
         messages.error(request, 'Tipo de producto no encontrado.')
         return redirect('lista_productos')
     modelo = MAPEO_PRODUCTOS[tipo]['modelo']
-    objetos = modelo.objects.all()
-    tarjetas = [construir_tarjeta(objeto, tipo) for objeto in objetos]
-    contexto = {
-        'productos': tarjetas,
-        'titulo_categoria': MAPEO_PRODUCTOS[tipo]['nombre'],
-        'formulario_busqueda': FormularioBusqueda(),
-    }
+    formulario = formulario_facetas(request, tipo)
+    resumen = obtener_facetas(tipo, formulario.facetas, formulario.seleccion(), *formulario.rango_precio())
+    pagina = paginar(request, formulario.filtrar(modelo.objects.all()), formulario.orden_keyset())
+    contexto = contexto_productos_por_tipo(tipo, pagina, formulario, resumen)
     return render(request, 'usuario/productos.html', contexto)
 
 
+@respuesta_condicional(validadores_detalle_producto)
+@cache_pagina_anonima
 def detalle_producto(request, tipo, pk):
     if tipo not in MAPEO_PRODUCTOS:
         messages.error(request, 'Producto no disponible.')
         return redirect('lista_productos')
     modelo = MAPEO_PRODUCTOS[tipo]['modelo']
     producto = get_object_or_404(modelo, pk=pk)
-    contexto = {
-        'producto': producto,
-        'tipo': tipo,
-        'formulario_busqueda': FormularioBusqueda(),
-    }
+    contexto = contexto_detalle_producto(tipo, producto)
     return render(request, 'usuario/detalle_producto.html', contexto)
 
 
+@cache_pagina_anonima
+async def index_asincrono(request):
+    contexto = contexto_index(await aobtener_destacados())
+    return await arender(request, 'usuario/index.html', contexto)
+
+
+@cache_pagina_anonima
+async def lista_productos_asincrono(request):
+    termino = request.GET.get('busqueda', '')
+    pagina = None
+    if termino:
+        entradas = await sync_to_async(buscar_en_catalogo)(termino)
+    else:
+        pagina = await apaginar(request, CatalogoProducto.objects.all(), ('precio', 'id'))
+        entradas = pagina.objetos
+    contexto = contexto_lista_productos(termino, entradas, pagina)
+    return await arender(request, 'usuario/productos.html', contexto)
+
+
+@respuesta_condicional(validadores_productos_por_tipo)
+@cache_pagina_anonima
+async def productos_por_tipo_asincrono(request, tipo):
+    if tipo not in MAPEO_PRODUCTOS:
+        messages.error(request, 'Tipo de producto no encontrado.')
+        return redirect('lista_productos')
+    modelo = MAPEO_PRODUCTOS[tipo]['modelo']
+    formulario = formulario_facetas(request, tipo)
+    resumen = await aobtener_facetas(tipo, formulario.facetas, formulario.seleccion(), *formulario.rango_precio())
+    pagina = await apaginar(request, formulario.filtrar(modelo.objects.all()), formulario.orden_keyset())
+    contexto = contexto_productos_por_tipo(tipo, pagina, formulario, resumen)
+    return await arender(request, 'usuario/productos.html', contexto)
+
+
+@respuesta_condicional(validadores_detalle_producto)
+@cache_pagina_anonima
+async def detalle_producto_asincrono(request, tipo, pk):
+    if tipo not in MAPEO_PRODUCTOS:
+        messages.error(request, 'Producto no disponible.')
+        return redirect('lista_productos')
+    modelo = MAPEO_PRODUCTOS[tipo]['modelo']
+    producto = await aget_object_or_404(modelo, pk=pk)
+    contexto = contexto_detalle_producto(tipo, producto)
+    return await arender(request, 'usuario/detalle_producto.html', contexto)
+
+
 def agregar_al_carrito(request, tipo, pk):
     if tipo not in MAPEO_PRODUCTOS:
         messages.error(request, 'No se pudo agregar el producto.')
         return redirect('lista_productos')
     modelo = MAPEO_PRODUCTOS[tipo]['modelo']
     producto = get_object_or_404(modelo, pk=pk)
-    carrito = obtener_carrito(request)
-    clave = f'{tipo}-{pk}'
-    if clave not in carrito:
-        carrito[clave] = {
-            'tipo': tipo,
-            'id': pk,
-            'nombre': producto.nombre,
-            'precio': str(producto.precio),
-            'cantidad': 1,
-            'categoria': getattr(producto, 'categoria', ''),
-            'imagen': producto.foto.url if producto.foto else '',
-        }
-    else:
-        carrito[clave]['cantidad'] += 1
-    guardar_carrito(request, carrito)
+    carrito = obtener_carrito(request, crear=True)
+    sumar_linea(carrito, tipo, producto)
     messages.success(request, 'Producto agregado al carrito.')
     return redirect('ver_carrito')
 
@@ -180,7 +333,7 @@ def ver_carrito(request):
     carrito = obtener_carrito(request)
     subtotal, impuestos, total = calcular_totales_carrito(carrito)
     contexto = {
-        'carrito': carrito,
+        'lineas': lineas_de(carrito),
         'subtotal': subtotal,
         'impuestos': impuestos,
         'total': total,
@@ -190,45 +343,85 @@ def ver_carrito(request):
 
 
 def actualizar_cantidad_carrito(request, clave):
-    carrito = obtener_carrito(request)
-    if request.method == 'POST' and clave in carrito:
+    if request.method == 'POST':
         try:
             cantidad = int(request.POST.get('cantidad', 1))
         except ValueError:
             cantidad = 1
-        if cantidad <= 0:
-            carrito.pop(clave)
-        else:
-            carrito[clave]['cantidad'] = cantidad
-        guardar_carrito(request, carrito)
-        messages.success(request, 'Carrito actualizado.')
+        if fijar_cantidad(obtener_carrito(request), clave, cantidad):
+            messages.success(request, 'Carrito actualizado.')
     return redirect('ver_carrito')
 
 
 def eliminar_del_carrito(request, clave):
-    carrito = obtener_carrito(request)
-    if clave in carrito:
-        carrito.pop(clave)
-        guardar_carrito(request, carrito)
+    if quitar_linea(obtener_carrito(request), clave):
         messages.info(request, 'Producto eliminado del carrito.')
     return redirect('ver_carrito')
 
 
 def vaciar_carrito(request):
-    guardar_carrito(request, {})
+    vaciar(obtener_carrito(request))
     messages.info(request, 'Carrito vacío.')
     return redirect('ver_carrito')
 
 
+def avisar_cambios_carrito(request, cambiadas, retiradas):
+    for linea in cambiadas:
+        messages.warning(
+            request,
+            f'El precio de {linea.nombre} cambió de ${linea.precio_anterior} a ${linea.precio}.'
+        )
+    for linea in retiradas:
+        messages.warning(request, f'{linea.nombre} ya no está disponible y se quitó del carrito.')
+
+
+def crear_pedido(usuario, lineas, metodo_pago, direccion, notas):
+    resumen = []
+    clave_productos = []
+    for linea in lineas:
+        resumen.append(f"{linea.nombre} x {linea.cantidad} (${linea.precio})")
+        clave_productos.append(linea.clave)
+
+    detalles = (
+        f"Método de pago: {metodo_pago}. "
+        f"Dirección de envío: {direccion}. "
+        f"Impuestos aplicados: 16%. "
+        f"Notas: {notas}. "
+        f"Productos: {' | '.join(resumen)}."
+    )
+    _, _, total = calcular_totales_lineas(lineas)
+
+    pedido = Pedido.objects.create(
+        id_producto=",".join(clave_productos),
+        usuario=usuario,
+        detalles=detalles,
+        precio=total,
+        fecha_entrega=timezone.now() + timedelta(days=5),
+        estado='Procesando'
+    )
+    lineas_pedido = PedidoLinea.objects.bulk_create([
+        PedidoLinea(
+            pedido=pedido,
+            tipo=linea.tipo,
+            id_producto=linea.id_producto,
+            nombre=linea.nombre,
+            precio_unitario=linea.precio,
+            cantidad=linea.cantidad,
+        )
+        for linea in lineas
+    ])
+    registrar_lineas(pedido, lineas_pedido)
+    return pedido
+
+
 @login_required
 def checkout(request):
     carrito = obtener_carrito(request)
-    if not carrito:
+    lineas = list(lineas_de(carrito))
+    if not lineas:
         messages.warning(request, 'El carrito está vacío.')
         return redirect('lista_productos')
 
-    subtotal, impuestos, total = calcular_totales_carrito(carrito)
-
     inicial = {
         'calle_envio': request.user.calle,
         'colonia_envio': request.user.colonia,
@@ -238,44 +431,40 @@ def checkout(request):
 
     if request.method == 'POST':
         formulario = FormularioCheckout(request.POST)
-        if formulario.is_valid():
-            metodo_pago = formulario.cleaned_data['metodo_pago']
-            direccion = (
-                f"{formulario.cleaned_data['calle_envio']} #{formulario.cleaned_data['numero_envio']}, "
-                f"{formulario.cleaned_data['colonia_envio']}, "
-                f"{formulario.cleaned_data['ciudad_envio']}"
-            )
-            notas = formulario.cleaned_data.get('notas', '')
-            resumen = []
-            clave_productos = []
-            for clave, datos in carrito.items():
-                resumen.append(f"{datos['nombre']} x {datos['cantidad']} (${datos['precio']})")
-                clave_productos.append(clave)
-
-            detalles = (
-                f"Método de pago: {metodo_pago}. "
-                f"Dirección de envío: {direccion}. "
-                f"Impuestos aplicados: 16%. "
-                f"Notas: {notas}. "
-                f"Productos: {' | '.join(resumen)}."
-            )
-
-            pedido = Pedido.objects.create(
-                id_producto=",".join(clave_productos),
-                usuario=request.user,
-                detalles=detalles,
-                precio=total,
-                fecha_entrega=timezone.now() + timedelta(days=5),
-                estado='Procesando'
-            )
-            guardar_carrito(request, {})
-            messages.success(request, f'Pedido generado con éxito. Número de pedido #{pedido.id_pedido}.')
-            return redirect('pedidos_usuario')
     else:
         formulario = FormularioCheckout(initial=inicial)
+    confirmado = request.method == 'POST' and formulario.is_valid()
+
+    if confirmado:
+        metodo_pago = formulario.cleaned_data['metodo_pago']
+        direccion = (
+            f"{formulario.cleaned_data['calle_envio']} #{formulario.cleaned_data['numero_envio']}, "
+            f"{formulario.cleaned_data['colonia_envio']}, "
+            f"{formulario.cleaned_data['ciudad_envio']}"
+        )
+        notas = formulario.cleaned_data.get('notas', '')
+
+        with escritura_inmediata():
+            # Los precios se releen en la primaria y bajo el candado de escritura: lo cobrado es lo vigente.
+            lineas, cambiadas, retiradas = revalidar_precios(lineas, using=router.db_for_write(Pedido))
+            if not (cambiadas or retiradas):
+                pedido = crear_pedido(request.user, lineas, metodo_pago, direccion, notas)
+                vaciar(carrito)
+                messages.success(request, f'Pedido generado con éxito. Número de pedido #{pedido.id_pedido}.')
+                return redirect('pedidos_usuario')
+    else:
+        lineas, cambiadas, retiradas = revalidar_precios(lineas)
+
+    avisar_cambios_carrito(request, cambiadas, retiradas)
+    if not lineas:
+        return redirect('ver_carrito')
+    if confirmado:
+        messages.warning(request, 'Revisa el nuevo total antes de confirmar tu compra.')
+
+    subtotal, impuestos, total = calcular_totales_lineas(lineas)
 
     contexto = {
-        'carrito': carrito,
+        'lineas': lineas,
         'subtotal': subtotal,
         'impuestos': impuestos,
         'total': total,
@@ -292,7 +481,9 @@ def registrar_usuario(request):
         formulario = FormularioRegistroUsuario(request.POST, request.FILES)
         if formulario.is_valid():
             nuevo = formulario.save()
+            carrito_anonimo = request.session.get('carrito')
             login(request, nuevo)
+            fusionar_carrito(carrito_anonimo, nuevo)
             messages.success(request, 'Cuenta creada correctamente.')
             return redirect('index')
     else:
@@ -315,7 +506,9 @@ def iniciar_sesion(request):
                 if not usuario_autenticado.es_activo:
                     messages.error(request, 'Tu cuenta está desactivada.')
                 else:
+                    carrito_anonimo = request.session.get('carrito')
                     login(request, usuario_autenticado)
+                    fusionar_carrito(carrito_anonimo, usuario_autenticado)
                     messages.success(request, 'Sesión iniciada.')
                     if usuario_autenticado.es_admin:
                         return redirect('panel_admin')
@@ -340,10 +533,11 @@ def cerrar_sesion(request):
 
 @login_required
 def perfil_usuario(request):
-    pedidos = request.user.pedidos.order_by('-fecha_pedido')
+    pagina = paginar(request, request.user.pedidos.all(), ('-fecha_pedido', '-id_pedido'))
     contexto = {
         'usuario_actual': request.user,
-        'pedidos': pedidos,
+        'pedidos': pagina.objetos,
+        'pagina': pagina,
         'formulario_busqueda': FormularioBusqueda(),
     }
     return render(request, 'usuario/perfil.html', contexto)
@@ -351,9 +545,10 @@ def perfil_usuario(request):
 
 @login_required
 def pedidos_usuario(request):
-    pedidos = request.user.pedidos.order_by('-fecha_pedido')
+    pagina = paginar(request, request.user.pedidos.all(), ('-fecha_pedido', '-id_pedido'))
     contexto = {
-        'pedidos': pedidos,
+        'pedidos': pagina.objetos,
+        'pagina': pagina,
         'formulario_busqueda': FormularioBusqueda(),
     }
     return render(request, 'usuario/perfil.html', contexto)
@@ -361,7 +556,7 @@ def pedidos_usuario(request):
 
 def buscar_productos(request):
     termino = request.GET.get('busqueda', '')
-    return redirect(f'/productos/?busqueda={termino}')
+    return redirect(f"{reverse('lista_productos')}?{urlencode({'busqueda': termino})}")
 
 
 def verificar_admin(usuario):
@@ -373,18 +568,8 @@ def panel_admin(request):
     if not verificar_admin(request.user):
         messages.error(request, 'Acceso restringido.')
         return redirect('index')
-    totales = {
-        'pc': PCArmada.objects.count(),
-        'teclado': Teclado.objects.count(),
-        'monitor': Monitor.objects.count(),
-        'mouse': Mouse.objects.count(),
-        'audifonos': Audifonos.objects.count(),
-        'proveedores': Proveedor.objects.count(),
-        'pedidos': Pedido.objects.count(),
-        'usuarios': Usuario.objects.count(),
-    }
     contexto = {
-        'totales': totales,
+        'totales': obtener_totales(),
     }
     return render(request, 'admin/panel.html', contexto)
 
@@ -397,9 +582,10 @@ def admin_lista_productos(request, tipo):
         messages.error(request, 'Tipo de producto desconocido.')
         return redirect('panel_admin')
     modelo = MAPEO_PRODUCTOS[tipo]['modelo']
-    objetos = modelo.objects.all()
+    pagina = paginar(request, modelo.objects.all(), ('precio', 'pk'))
     contexto = {
-        'objetos': objetos,
+        'objetos': pagina.objetos,
+        'pagina': pagina,
         'tipo': tipo,
         'titulo': MAPEO_PRODUCTOS[tipo]['nombre'],
     }
@@ -418,6 +604,7 @@ def admin_crear_producto(request, tipo):
         formulario = formulario_clase(request.POST, request.FILES)
         if formulario.is_valid():
             formulario.save()
+            programar_derivados_producto(formulario, tipo)
             messages.success(request, 'Producto creado.')
             return redirect('admin_lista_productos', tipo=tipo)
     else:
@@ -444,6 +631,7 @@ def admin_editar_producto(request, tipo, pk):
         formulario = formulario_clase(request.POST, request.FILES, instance=objeto)
         if formulario.is_valid():
             formulario.save()
+            programar_derivados_producto(formulario, tipo)
             messages.success(request, 'Producto actualizado.')
             return redirect('admin_lista_productos', tipo=tipo)
     else:
@@ -474,9 +662,10 @@ def admin_eliminar_producto(request, tipo, pk):
 def admin_lista_proveedores(request):
     if not verificar_admin(request.user):
         return redirect('index')
-    proveedores = Proveedor.objects.all()
+    pagina = paginar(request, Proveedor.objects.all(), ('pk',))
     contexto = {
-        'proveedores': proveedores,
+        'proveedores': pagina.objetos,
+        'pagina': pagina,
     }
     return render(request, 'admin/lista_proveedores.html', contexto)
 
@@ -534,14 +723,43 @@ def admin_eliminar_proveedor(request, pk):
 def admin_lista_pedidos(request):
     if not verificar_admin(request.user):
         return redirect('index')
-    pedidos = Pedido.objects.select_related('usuario').order_by('-fecha_pedido')
+    pedidos = Pedido.objects.select_related('usuario').defer('detalles').annotate(
+        resumen_detalles=Substr('detalles', 1, LONGITUD_RESUMEN_DETALLES + 1)
+    )
+    pagina = paginar(request, pedidos, ('-fecha_pedido', '-id_pedido'))
     contexto = {
-        'pedidos': pedidos,
+        'pedidos': pagina.objetos,
+        'pagina': pagina,
+        'longitud_resumen': LONGITUD_RESUMEN_DETALLES,
+        'formulario_filtro': FormularioFiltroPedidos(),
+        'formulario_masivo': FormularioEstadoMasivo(),
         'formulario_estado': FormularioEstadoPedido(),
     }
     return render(request, 'admin/lista_pedidos.html', contexto)
 
 
+@login_required
+def admin_exportar_pedidos(request):
+    if not verificar_admin(request.user):
+        return redirect('index')
+    formulario = FormularioFiltroPedidos(request.GET)
+    if not formulario.is_valid():
+        messages.error(request, 'Filtros de exportación inválidos.')
+        return redirect('admin_lista_pedidos')
+    pedidos = formulario.filtrar(
+        Pedido.objects.select_related('usuario').order_by('fecha_pedido', 'id_pedido')
+    )
+    contenido = csv_pedidos(pedidos)
+    nombre = f"pedidos-{timezone.localdate():%Y%m%d}.csv"
+    if request.GET.get('gzip'):
+        respuesta = StreamingHttpResponse(comprimir_gzip(contenido), content_type='application/gzip')
+        nombre += '.gz'
+    else:
+        respuesta = StreamingHttpResponse(contenido, content_type='text/csv; charset=utf-8')
+    respuesta['Content-Disposition'] = f'attachment; filename="{nombre}"'
+    return respuesta
+
+
 @login_required
 def admin_actualizar_estado_pedido(request, pk):
     if not verificar_admin(request.user):
@@ -550,19 +768,102 @@ def admin_actualizar_estado_pedido(request, pk):
     if request.method == 'POST':
         formulario = FormularioEstadoPedido(request.POST, instance=pedido)
         if formulario.is_valid():
-            formulario.save()
+            with escritura_inmediata():
+                formulario.save()
             messages.success(request, 'Estado del pedido actualizado.')
     return redirect('admin_lista_pedidos')
 
 
+@login_required
+def admin_actualizar_estado_pedidos(request):
+    if not verificar_admin(request.user):
+        return redirect('index')
+    if request.method == 'POST':
+        formulario = FormularioEstadoMasivo(request.POST)
+        if formulario.is_valid():
+            actualizados = actualizar_estado_pedidos(
+                formulario.pedidos_seleccionados(),
+                formulario.cleaned_data['nuevo_estado'],
+                formulario.cleaned_data['fecha_entrega'],
+            )
+            messages.success(request, f'{actualizados} pedidos actualizados.')
+        else:
+            for error in formulario.errors.values():
+                messages.error(request, error.as_text())
+    return redirect('admin_lista_pedidos')
+
+
 @login_required
 def admin_detalle_usuario(request, pk):
     if not verificar_admin(request.user):
         return redirect('index')
     usuario_obj = get_object_or_404(Usuario, pk=pk)
-    pedidos = usuario_obj.pedidos.order_by('-fecha_pedido')
+    pagina = paginar(request, usuario_obj.pedidos.all(), ('-fecha_pedido', '-id_pedido'))
     contexto = {
         'usuario_obj': usuario_obj,
-        'pedidos': pedidos,
+        'pedidos': pagina.objetos,
+        'pagina': pagina,
     }
-    return render(request, 'admin/detalle_usuario.html', contexto)
\ No newline at end of file
+    return render(request, 'admin/detalle_usuario.html', contexto)
+
+
+@login_required
+def admin_analitica(request):
+    if not verificar_admin(request.user):
+        return redirect('index')
+    try:
+        dias = int(request.GET.get('dias', DIAS_ANALITICA))
+    except ValueError:
+        dias = DIAS_ANALITICA
+    dias = min(max(dias, 1), MAXIMO_DIAS_ANALITICA)
+    contexto = {
+        'dias': dias,
+        'opciones_dias': [7, 30, 90, 365],
+        **resumen_ventas(dias),
+    }
+    return render(request, 'admin/analitica.html', contexto)
+
+
+@login_required
+def metricas(request):
+    if not verificar_admin(request.user):
+        return redirect('index')
+    return HttpResponse(registro.texto_prometheus(), content_type=TIPO_PROMETHEUS)
+
+
+def ruta_segura(raiz, ruta):
+    try:
+        absoluta = safe_join(raiz, ruta)
+    except SuspiciousFileOperation:
+        raise Http404('Archivo no encontrado.')
+    if not os.path.isfile(absoluta):
+        raise Http404('Archivo no encontrado.')
+    return absoluta
+
+
+def servir_estatico(request, ruta):
+    absoluta = ruta_segura(settings.STATIC_ROOT, ruta)
+    servida, codificacion = variante_precomprimida(request, absoluta)
+    versionado = getattr(staticfiles_storage, 'es_versionado', lambda nombre: False)(ruta)
+    return respuesta_archivo(
+        request,
+        servida,
+        tipo_de_archivo(absoluta),
+        CACHE_INMUTABLE if versionado else CACHE_REVALIDAR,
+        codificacion,
+        variar=('Accept-Encoding',),
+    )
+
+
+def servir_media(request, ruta):
+    absoluta = ruta_segura(settings.MEDIA_ROOT, ruta)
+    delegacion = None
+    if settings.MEDIA_DESCARGA_DELEGADA:
+        delegacion = (settings.MEDIA_DESCARGA_DELEGADA, f'{settings.MEDIA_PREFIJO_INTERNO}{ruta}')
+    return respuesta_archivo(
+        request,
+        absoluta,
+        tipo_de_archivo(absoluta),
+        settings.MEDIA_CACHE_CONTROL,
+        delegacion=delegacion,
+    )
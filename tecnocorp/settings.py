@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from django.contrib.messages import constants as message_constants
 
@@ -43,6 +44,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'app_tecnocorp.metricas.MiddlewareMetricas',
+    'app_tecnocorp.middleware.MiddlewareCompresion',
+    'app_tecnocorp.middleware.MiddlewareReplica',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -55,7 +59,7 @@ ROOT_URLCONF = 'tecnocorp.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'app_tecnocorp.metricas.PlantillasMedidas',
         'DIRS': [BASE_DIR / 'app_tecnocorp' / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -64,6 +68,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'app_tecnocorp.context_processors.csrf_pagina_en_cache',
             ],
         },
     },
@@ -75,13 +80,73 @@ ASGI_APPLICATION = 'tecnocorp.asgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+PRAGMAS_SQLITE = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -32000,
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ''.join(f'PRAGMA {nombre}={valor};' for nombre, valor in PRAGMAS_SQLITE.items()),
+            'timeout': PRAGMAS_SQLITE['busy_timeout'] / 1000,
+        },
     }
 }
 
+# Réplica de solo lectura para el catálogo, p. ej. una copia local mantenida con refrescar_replica.
+RUTA_REPLICA = os.environ.get('TECNOCORP_REPLICA_SQLITE')
+
+if RUTA_REPLICA:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': RUTA_REPLICA,
+        'OPTIONS': {
+            # journal_mode y synchronous escriben en la base; la réplica solo se lee.
+            'init_command': ''.join(
+                f'PRAGMA {nombre}={valor};' for nombre, valor in PRAGMAS_SQLITE.items()
+                if nombre not in ('journal_mode', 'synchronous')
+            ),
+            'timeout': PRAGMAS_SQLITE['busy_timeout'] / 1000,
+        },
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['app_tecnocorp.routers.RouterReplica']
+
+SEGUNDOS_PRIMARIA_TRAS_ESCRITURA = 30
+
+# Versiones asíncronas de las vistas del catálogo, desactivadas por defecto. Con SQLite no mejoran la latencia
+# ni el rendimiento bajo ASGI (el ORM asíncrono serializa las consultas en un hilo; ver benchmark_asgi).
+VISTAS_CATALOGO_ASINCRONAS = os.environ.get('TECNOCORP_VISTAS_ASINCRONAS') == '1'
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tecnocorp',
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    }
+}
+
+SEGUNDOS_CACHE_PAGINAS = 600
+
+# Respuestas más pequeñas no compensan el costo de comprimirlas.
+COMPRESION_TAMAÑO_MINIMO = 1024
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -121,9 +186,25 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'app_tecnocorp' / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'app_tecnocorp.almacenamiento.AlmacenamientoEstaticoComprimido',
+    },
+}
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+MEDIA_CACHE_CONTROL = 'public, max-age=86400'
+
+# Con un proxy al frente, Django solo valida y el proxy envía el archivo:
+# 'x-accel-redirect' (nginx, location interna en MEDIA_PREFIJO_INTERNO) o 'x-sendfile' (Apache, lighttpd).
+MEDIA_DESCARGA_DELEGADA = os.environ.get('TECNOCORP_MEDIA_DELEGADA', '')
+MEDIA_PREFIJO_INTERNO = '/media-interna/'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -15,14 +15,26 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from app_tecnocorp.views import servir_estatico, servir_media
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('app_tecnocorp.urls')),
+    re_path(
+        rf'^{settings.MEDIA_URL.strip("/")}/(?P<ruta>(?:productos|derivados)/.+)$',
+        servir_media,
+        name='servir_media',
+    ),
 ]
 
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+else:
+    # Sin CDN: la aplicación sirve los estáticos versionados que deja collectstatic.
+    urlpatterns += [
+        re_path(rf'^{settings.STATIC_URL.strip("/")}/(?P<ruta>.+)$', servir_estatico, name='servir_estatico'),
+    ]
\ No newline at end of file